@@ -105,7 +105,7 @@ def handle_command(
         try:
             filename = conversation.save_to_file(save_arg if save_arg else None)
             display.show_success(f"Histórico salvo em: {filename}")
-        except IOError as e:
+        except (IOError, ValueError) as e:
             logger.error("Falha ao salvar histórico: %s", e)
             display.show_error(str(e))
         return CommandResult.CONTINUE
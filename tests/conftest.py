@@ -10,6 +10,16 @@ from tests.helpers import create_mock_stream, MockStreamingResponse
 # Mock Config Fixtures
 # =============================================================================
 
+@pytest.fixture(autouse=True)
+def reset_system_prompt_cache():
+    """Descarta o system prompt em cache, já que os testes alteram a config."""
+    from utils.conversation import ConversationManager
+
+    ConversationManager.reload_prompt()
+    yield
+    ConversationManager.reload_prompt()
+
+
 @pytest.fixture
 def mock_config_attrs():
     """Atributos padrão para mock de configuração."""
@@ -93,6 +93,20 @@ class TestHandleCommand:
         assert result == CommandResult.CONTINUE
         self.mock_display.show_error.assert_called_once()
 
+    def test_save_command_invalid_format(self):
+        """ValueError ao salvar deve ser exibido como erro, sem encerrar."""
+        self.mock_conversation.save_to_file.side_effect = ValueError(
+            "Formato msgpack requer o pacote msgspec"
+        )
+        result = handle_command(
+            "/salvar dados.msgpack",
+            self.mock_conversation,
+            self.mock_client,
+            self.mock_display,
+        )
+        assert result == CommandResult.CONTINUE
+        self.mock_display.show_error.assert_called_once()
+
     def test_save_command_with_filename(self):
         """Verifica se '/salvar nome.json' usa o nome personalizado."""
         self.mock_conversation.save_to_file.return_value = "history/meu_arquivo.json"
@@ -336,6 +336,26 @@ class TestThreadSafeCachedProperty:
         prop = TestClass.__dict__["my_property"]
         assert prop.attr_name == "my_property"
 
+    def test_nested_properties_share_instance_lock(self):
+        """Propriedades que dependem de outras não devem causar deadlock."""
+
+        class TestClass:
+            def __init__(self):
+                self._init_lock = threading.RLock()
+
+            @_ThreadSafeCachedProperty
+            def base(self):
+                return "base"
+
+            @_ThreadSafeCachedProperty
+            def derived(self):
+                return f"{self.base}_derived"
+
+        instance = TestClass()
+
+        assert instance.derived == "base_derived"
+        assert "base" in instance.__dict__
+
 
 class TestConfigUpperBounds:
     """Testes para limites superiores de configuração."""
@@ -18,6 +18,35 @@ class TestConversationManager:
         assert len(manager.messages) == 1
         assert manager.messages[0]["role"] == "system"
 
+    def test_system_prompt_built_lazily(self):
+        """System prompt só deve ser construído no primeiro uso."""
+        manager = ConversationManager()
+
+        assert "system_prompt" not in manager.__dict__
+
+        messages = manager.get_messages()
+
+        assert "system_prompt" in manager.__dict__
+        assert messages[0]["content"] == manager.system_prompt
+
+    def test_system_prompt_shared_between_instances(self, mock_config_conversation):
+        """System prompt deve ser construído uma vez e reutilizado."""
+        first_prompt = ConversationManager().system_prompt
+        mock_config_conversation.SYSTEM_PROMPT = "Prompt alterado"
+
+        assert ConversationManager().system_prompt is first_prompt
+
+    def test_reload_prompt_applies_new_config(self, mock_config_conversation):
+        """reload_prompt deve reconstruir o prompt com a config atual."""
+        first = ConversationManager()
+        assert "Prompt alterado" not in first.system_prompt
+
+        mock_config_conversation.SYSTEM_PROMPT = "Prompt alterado"
+        ConversationManager.reload_prompt()
+        second = ConversationManager()
+
+        assert second.system_prompt.startswith("Prompt alterado")
+
     def test_add_user_message(self):
         """Verifica se mensagens do usuário são adicionadas corretamente."""
         manager = ConversationManager()
@@ -104,6 +133,37 @@ class TestConversationManager:
         assert "messages" in data
         assert len(data["messages"]) == 2
 
+    def test_save_to_file_without_orjson(self, tmp_path, monkeypatch):
+        """Sem orjson, o histórico deve ser salvo com o json da stdlib."""
+        monkeypatch.chdir(tmp_path)
+
+        manager = ConversationManager()
+        manager.add_user_message("Olá, açúcar")
+
+        with patch("utils.conversation.orjson", None):
+            saved_path = manager.save_to_file("fallback.json")
+
+        with open(saved_path, "r", encoding="utf-8") as f:
+            raw = f.read()
+        data = json.loads(raw)
+
+        assert data["messages"][0]["content"] == "Olá, açúcar"
+        assert "\n" not in raw
+
+    def test_save_to_file_failed_replace_removes_temp_file(self, tmp_path, monkeypatch):
+        """Falha ao substituir o destino não deve deixar arquivo temporário."""
+        monkeypatch.chdir(tmp_path)
+
+        manager = ConversationManager()
+        manager.add_user_message("Teste")
+
+        with patch("utils.conversation.os.replace", side_effect=OSError("disco cheio")):
+            with pytest.raises(IOError):
+                manager.save_to_file("falha.json")
+
+        assert not list(tmp_path.rglob("*.tmp"))
+        assert not list(tmp_path.rglob("falha.json"))
+
     def test_save_to_file_auto_filename(self, tmp_path, monkeypatch):
         """Verifica se o nome do arquivo é gerado automaticamente."""
         monkeypatch.chdir(tmp_path)
@@ -129,6 +189,19 @@ class TestConversationManager:
         assert removed == "Segunda"
         assert manager.message_count() == 2
 
+    def test_remove_last_user_message_before_assistant_reply(self):
+        """Usuário seguido de resposta: remove apenas a mensagem do usuário."""
+        manager = ConversationManager()
+        manager.add_user_message("Pergunta")
+        manager.add_assistant_message("Resposta")
+
+        removed = manager.remove_last_user_message()
+
+        assert removed == "Pergunta"
+        assert manager.get_history_for_display() == [
+            {"role": "assistant", "content": "Resposta"}
+        ]
+
     def test_remove_last_user_message_empty(self):
         """Verifica comportamento quando não há mensagens do usuário."""
         manager = ConversationManager()
@@ -180,6 +253,21 @@ class TestConversationManager:
         sanitized = manager._sanitize_filename("...")
         assert sanitized == "history.json"
 
+    def test_sanitize_filename_strips_all_extensions(self):
+        """Todas as extensões finais devem ser removidas."""
+        manager = ConversationManager()
+
+        assert manager._sanitize_filename("file.json.bak") == "file.json"
+        assert manager._sanitize_filename("file.v1.final!") == "file.v1.final!.json"
+
+    def test_sanitize_filename_many_dots(self):
+        """Nomes longos com muitos pontos devem ser sanitizados sem backtracking."""
+        manager = ConversationManager()
+        name = "a" + ".a" * 200_000
+
+        assert manager._sanitize_filename(name + "!") == name + "!.json"
+        assert manager._sanitize_filename(name) == "a.json"
+
     def test_sanitize_filename_control_chars(self):
         """Caracteres de controle devem ser removidos."""
         manager = ConversationManager()
@@ -218,6 +306,13 @@ class TestConversationManager:
         sanitized = manager._sanitize_filename("history.json.bak")
         assert sanitized == "history.json"
 
+    def test_sanitize_filename_with_many_extensions(self):
+        """Todas as extensões finais devem ser removidas de uma vez."""
+        manager = ConversationManager()
+
+        sanitized = manager._sanitize_filename("foo.json.bak.tar.gz")
+        assert sanitized == "foo.json"
+
     def test_sanitize_filename_case_insensitive_json(self):
         """Extensão .JSON (maiúscula) deve ser tratada corretamente."""
         manager = ConversationManager()
@@ -238,15 +333,26 @@ class TestConversationManager:
 
             assert "Erro ao salvar" in str(exc_info.value)
 
-    def test_get_messages_returns_copy(self):
-        """get_messages deve retornar cópia, não referência."""
+    def test_get_messages_returns_snapshot(self):
+        """get_messages deve retornar snapshot imutável, não referência."""
         manager = ConversationManager()
         manager.add_user_message("Teste")
 
         messages = manager.get_messages()
-        messages.append({"role": "fake", "content": "fake"})
+        manager.add_assistant_message("Resposta")
+
+        assert isinstance(messages, tuple)
+        assert len(messages) == 2
+        assert len(manager.get_messages()) == 3
+
+    def test_messages_property_is_read_only(self):
+        """Modificar messages deve falhar em vez de ser ignorado."""
+        manager = ConversationManager()
+
+        with pytest.raises(AttributeError):
+            manager.messages.append({"role": "user", "content": "Perdida"})
 
-        assert len(manager.get_messages()) == 2
+        assert manager.message_count() == 0
 
     def test_conversation_flow(self):
         """Testa um fluxo de conversa completo."""
@@ -483,6 +589,52 @@ class TestLoadFromFile:
 
             assert "role inválido" in str(exc_info.value)
 
+    def test_load_from_file_non_string_role(self, tmp_path):
+        """Role não-string deve levantar erro."""
+        history_dir = tmp_path / "history"
+        history_dir.mkdir()
+        test_file = history_dir / "list_role.json"
+        test_data = {
+            "messages": [{"role": ["user"], "content": "test"}]
+        }
+        test_file.write_text(json.dumps(test_data), encoding="utf-8")
+
+        with patch("utils.conversation.config") as mock_config:
+            mock_config.HISTORY_DIR = str(history_dir)
+            mock_config.SYSTEM_PROMPT = "Test"
+            mock_config.RESPONSE_LANGUAGE = ""
+            mock_config.RESPONSE_LENGTH = ""
+            mock_config.RESPONSE_TONE = ""
+            mock_config.RESPONSE_FORMAT = ""
+            mock_config.MAX_HISTORY_SIZE = 50
+
+            manager = ConversationManager()
+
+            with pytest.raises(ConversationLoadError) as exc_info:
+                manager.load_from_file("list_role.json")
+
+            assert "role inválido" in str(exc_info.value)
+
+    def test_load_from_file_uses_canonical_roles(self, mock_config_conversation, tmp_path):
+        """Roles carregados devem reutilizar as strings canônicas."""
+        from utils.conversation import ROLE_ASSISTANT, ROLE_USER
+
+        test_file = tmp_path / "roles.json"
+        test_data = {
+            "messages": [
+                {"role": "user", "content": "Olá"},
+                {"role": "assistant", "content": "Oi!"},
+            ]
+        }
+        test_file.write_text(json.dumps(test_data), encoding="utf-8")
+
+        manager = ConversationManager()
+        manager.load_from_file("roles.json")
+
+        roles = [msg["role"] for msg in manager.get_history_for_display()]
+        assert roles[0] is ROLE_USER
+        assert roles[1] is ROLE_ASSISTANT
+
     def test_load_from_file_content_too_large(self, tmp_path):
         """Mensagem muito grande deve levantar erro."""
         history_dir = tmp_path / "history"
@@ -630,6 +782,91 @@ class TestListHistoryFiles:
             assert files[0][0] == "valid.json"
 
 
+class TestMessagePackFormat:
+    """Testes para o formato alternativo MessagePack."""
+
+    def test_save_and_load_msgpack_roundtrip(self, mock_config_conversation, tmp_path):
+        """Histórico salvo em msgpack deve ser carregado de volta."""
+        manager = ConversationManager()
+        manager.add_user_message("Olá")
+        manager.add_assistant_message("Oi!")
+
+        saved_path = manager.save_to_file("conversa", file_format="msgpack")
+
+        assert saved_path.endswith("conversa.msgpack")
+        assert (tmp_path / "conversa.msgpack").exists()
+
+        loaded = ConversationManager()
+        count = loaded.load_from_file("conversa.msgpack")
+
+        assert count == 2
+        assert loaded.get_history_for_display() == manager.get_history_for_display()
+
+    def test_format_inferred_from_extension(self, mock_config_conversation, tmp_path):
+        """Extensão .msgpack no nome deve selecionar o formato msgpack."""
+        manager = ConversationManager()
+        manager.add_user_message("Teste")
+
+        saved_path = manager.save_to_file("dados.msgpack")
+
+        assert saved_path.endswith("dados.msgpack")
+        assert not (tmp_path / "dados.json").exists()
+
+    def test_invalid_format_raises_error(self, mock_config_conversation):
+        """Formato desconhecido deve levantar ValueError."""
+        manager = ConversationManager()
+
+        with pytest.raises(ValueError):
+            manager.save_to_file("teste", file_format="xml")
+
+    def test_list_includes_msgpack_files(self, mock_config_conversation):
+        """Arquivos msgpack devem aparecer na listagem."""
+        manager = ConversationManager()
+        manager.add_user_message("Teste")
+        manager.save_to_file("a.json")
+        manager.save_to_file("b.msgpack")
+
+        names = {name for name, _, _ in manager.list_history_files()}
+
+        assert names == {"a.json", "b.msgpack"}
+
+    def test_list_skips_non_object_histories(self, mock_config_conversation, tmp_path):
+        """Arquivos cujo conteúdo não é um objeto devem ser ignorados."""
+        msgspec = pytest.importorskip("msgspec")
+
+        (tmp_path / "lista.json").write_text("[1, 2]", encoding="utf-8")
+        (tmp_path / "escalar.msgpack").write_bytes(msgspec.msgpack.encode(42))
+        manager = ConversationManager()
+        manager.add_user_message("Teste")
+        manager.save_to_file("ok.json")
+
+        names = {name for name, _, _ in manager.list_history_files()}
+
+        assert names == {"ok.json"}
+
+    def test_save_msgpack_without_msgspec(self, mock_config_conversation, tmp_path):
+        """Sem msgspec, salvar em msgpack deve levantar ValueError claro."""
+        manager = ConversationManager()
+        manager.add_user_message("Teste")
+
+        with patch("utils.conversation.msgspec", None):
+            with pytest.raises(ValueError, match="msgspec"):
+                manager.save_to_file("dados.msgpack")
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_load_invalid_msgpack(self, mock_config_conversation, tmp_path):
+        """Conteúdo msgpack inválido deve levantar ConversationLoadError."""
+        (tmp_path / "ruim.msgpack").write_bytes(b"\xc1")
+
+        manager = ConversationManager()
+
+        with pytest.raises(ConversationLoadError) as exc_info:
+            manager.load_from_file("ruim.msgpack")
+
+        assert "MSGPACK inválido" in str(exc_info.value)
+
+
 class TestPathTraversalProtection:
     """Testes para proteção contra path traversal."""
 
@@ -1,10 +1,21 @@
 """Testes para o módulo de exibição."""
 
+import io
 import pytest
 import threading
 import time
-from unittest.mock import patch
-from utils.display import Display, RotatingSpinner, StreamingTextDisplay, THINKING_WORDS
+from unittest.mock import MagicMock, patch
+from utils.display import (
+    Display,
+    RotatingSpinner,
+    StreamingTextDisplay,
+    SPINNER_REFRESH_RATE,
+    SpinnerState,
+    THINKING_WORDS,
+    WORD_CHANGE_INTERVAL,
+)
+
+NS = 1_000_000_000
 
 
 class TestThinkingWords:
@@ -23,6 +34,198 @@ class TestThinkingWords:
         assert len(THINKING_WORDS) >= 10
 
 
+class TestLazyImports:
+    """Testes para importação tardia de módulos pesados do Rich."""
+
+    def test_import_does_not_load_markdown(self):
+        """Importar o módulo não deve carregar rich.markdown nem rich.live."""
+        import subprocess
+        import sys
+        from pathlib import Path
+
+        code = (
+            "import sys, utils.display; "
+            "print('rich.markdown' in sys.modules, 'rich.live' in sys.modules)"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            cwd=Path(__file__).resolve().parent.parent,
+            check=True,
+        )
+
+        assert result.stdout.strip() == "False False"
+
+    def test_readline_skipped_without_tty(self):
+        """Sem TTY na entrada, readline não deve ser importado."""
+        import subprocess
+        import sys
+        from pathlib import Path
+
+        code = "import sys, utils.display as d; print(d.HAS_READLINE, 'readline' in sys.modules)"
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            stdin=subprocess.DEVNULL,
+            cwd=Path(__file__).resolve().parent.parent,
+            check=True,
+        )
+
+        assert result.stdout.strip() == "False False"
+
+
+class TestSynchronizedOutput:
+    """Testes para a saída sincronizada (modo 2026) do Live."""
+
+    def _refresh(self, console):
+        from rich.text import Text
+        from utils.display import _live_class
+
+        live = _live_class()(console=console, get_renderable=lambda: Text("quadro"))
+        live.start()
+        live.stop()
+        return console.file.getvalue()
+
+    def test_terminal_brackets_each_refresh(self):
+        """Em terminais, cada redesenho deve ser delimitado pelo modo 2026."""
+        from rich.console import Console
+        from utils.display import BEGIN_SYNCHRONIZED_UPDATE, END_SYNCHRONIZED_UPDATE
+
+        console = Console(file=io.StringIO(), force_terminal=True, width=40)
+        output = self._refresh(console)
+
+        begin = output.index(BEGIN_SYNCHRONIZED_UPDATE)
+        assert begin < output.index("quadro") < output.rindex(END_SYNCHRONIZED_UPDATE)
+        assert output.count(BEGIN_SYNCHRONIZED_UPDATE) == output.count(END_SYNCHRONIZED_UPDATE)
+
+    def test_skip_unchanged_idles_without_new_frame(self):
+        """Refresh sem quadro novo não deve escrever no terminal."""
+        from rich.console import Console
+        from rich.text import Text
+        from utils.display import _live_class
+
+        frame = Text("quadro")
+        console = Console(file=io.StringIO(), force_terminal=True, width=40)
+        live = _live_class()(
+            console=console, auto_refresh=False, get_renderable=lambda: frame, skip_unchanged=True
+        )
+        live.start(refresh=True)
+        try:
+            written = len(console.file.getvalue())
+            live.refresh()
+            assert len(console.file.getvalue()) == written
+
+            frame = Text("novo quadro")
+            live.refresh()
+            assert "novo quadro" in console.file.getvalue()[written:]
+        finally:
+            live.stop()
+
+    def test_non_terminal_has_no_sequences(self):
+        """Fora de um terminal nenhuma sequência deve ser emitida."""
+        from rich.console import Console
+        from utils.display import BEGIN_SYNCHRONIZED_UPDATE
+
+        console = Console(file=io.StringIO(), force_terminal=False, width=40)
+        output = self._refresh(console)
+
+        assert BEGIN_SYNCHRONIZED_UPDATE not in output
+
+    def test_sequences_are_control_segments(self):
+        """As sequências devem ser segmentos de controle, sem largura."""
+        from utils.display import _synchronized_controls
+
+        for control in _synchronized_controls():
+            assert control.segment.is_control
+            assert control.segment.cell_length == 0
+
+    def test_recorded_text_has_no_sequences(self):
+        """export_text não deve incluir as sequências do modo 2026."""
+        from rich.console import Console
+        from rich.text import Text
+        from utils.display import BEGIN_SYNCHRONIZED_UPDATE, _live_class
+
+        console = Console(file=io.StringIO(), force_terminal=True, width=40, record=True)
+        live = _live_class()(console=console, get_renderable=lambda: Text("quadro"))
+        live.start(refresh=True)
+        live.stop()
+
+        assert BEGIN_SYNCHRONIZED_UPDATE not in console.export_text()
+
+    def test_incompatible_rich_falls_back_to_plain_live(self):
+        """Sem os atributos privados esperados, o Live padrão deve ser usado."""
+        from rich.console import Console
+        from rich.text import Text
+        from utils.display import BEGIN_SYNCHRONIZED_UPDATE, _live_class
+
+        console = Console(file=io.StringIO(), force_terminal=True, width=40)
+        with patch("utils.display._live_internals", return_value=None):
+            live = _live_class()(console=console, get_renderable=lambda: Text("quadro"))
+        live.start(refresh=True)
+        live.stop()
+
+        output = console.file.getvalue()
+        assert "quadro" in output
+        assert BEGIN_SYNCHRONIZED_UPDATE not in output
+
+    def test_missing_live_stack_disables_synchronization(self):
+        """Console sem _live_stack não deve impedir a criação do Live."""
+        from rich.console import Console
+        from utils.display import _live_class, _live_internals
+
+        console = Console(file=io.StringIO(), force_terminal=True, width=40)
+        del console._live_stack
+
+        live = _live_class()(console=console)
+
+        assert _live_internals(live) is None
+        assert live._sync is None
+
+    def test_unsupported_control_segments_disable_synchronization(self):
+        """Se o Rich não aceitar os segmentos de controle, não há sincronização."""
+        from utils.display import _synchronized_controls
+
+        _synchronized_controls.cache_clear()
+        try:
+            with patch("utils.display._raw_control", side_effect=TypeError("mudou")):
+                assert _synchronized_controls() is None
+        finally:
+            _synchronized_controls.cache_clear()
+
+
+class TestSharedMarkdownParser:
+    """Testes para o parser markdown-it compartilhado."""
+
+    def test_renders_like_rich_markdown(self):
+        """Saída deve ser igual à do Markdown do Rich."""
+        from rich.console import Console
+        from rich.markdown import Markdown
+        from utils.display import _markdown
+
+        text = "# Título\n\n- **item** ~~riscado~~\n\n| a | b |\n|---|---|\n| 1 | 2 |\n"
+
+        def render(renderable):
+            console = Console(file=io.StringIO(), width=60, force_terminal=True)
+            console.print(renderable)
+            return console.file.getvalue()
+
+        assert render(_markdown(text)) == render(Markdown(text))
+
+    def test_parser_built_once(self):
+        """O parser deve ser criado uma vez e cada Markdown ter seu próprio parse."""
+        from utils.display import _markdown, _markdown_prototype
+
+        first = _markdown("um")
+        second = _markdown("dois")
+
+        assert _markdown_prototype() is _markdown_prototype()
+        assert first.markup == "um"
+        assert second.markup == "dois"
+        assert first.parsed is not second.parsed
+
+
 class TestRotatingSpinner:
     """Testes para a classe RotatingSpinner."""
 
@@ -34,7 +237,7 @@ class TestRotatingSpinner:
         spinner = RotatingSpinner(console)
 
         assert spinner.running is False
-        assert spinner.thread is None
+        assert spinner.live is None
         assert spinner.word_change_interval == 5.0
 
     def test_spinner_chars(self):
@@ -71,6 +274,26 @@ class TestRotatingSpinner:
         assert "running=True" in repr(spinner)
         spinner.stop()
 
+    def test_spinner_body_rebuilt_only_when_visible_state_changes(self):
+        """Troca apenas do caractere animado não deve remontar o corpo do spinner."""
+        from rich.console import Console
+
+        spinner = RotatingSpinner(Console())
+        spinner._state = SpinnerState(word_index=0, start_ns=50 * NS)
+
+        with patch("utils.display.time.monotonic_ns", return_value=50 * NS):
+            first = str(spinner._get_renderable())
+        body = spinner._body
+        with patch(
+            "utils.display.time.monotonic_ns",
+            return_value=50 * NS + int(1.5 * NS / SPINNER_REFRESH_RATE),
+        ):
+            second = str(spinner._get_renderable())
+
+        assert spinner._body is body
+        assert first[1:] == second[1:]
+        assert first[0] != second[0]
+
     def test_format_tokens_thousands(self):
         """Verifica formatação de tokens em milhares (K)."""
         from rich.console import Console
@@ -105,6 +328,26 @@ class TestDisplay:
         assert display.console is not None
         assert display.spinner is not None
 
+    def test_displays_share_module_console(self):
+        """Instâncias sem console explícito devem compartilhar o mesmo Console."""
+        first = Display()
+        second = Display()
+
+        assert first.console is second.console
+        assert first.spinner.console is first.console
+        assert first.streaming.console is first.console
+
+    def test_explicit_console_is_used(self):
+        """Console explícito deve ser repassado ao spinner e ao streaming."""
+        from rich.console import Console
+
+        console = Console(file=io.StringIO())
+        display = Display(console=console)
+
+        assert display.console is console
+        assert display.spinner.console is console
+        assert display.streaming.console is console
+
     def test_show_success(self, capsys):
         """Verifica se mensagem de sucesso é exibida."""
         display = Display()
@@ -169,6 +412,23 @@ class TestDisplay:
         assert "openai/gpt-4" in captured.out
         assert "/carregar" in captured.out
 
+    def test_show_history_list_does_not_parse_markup(self, capsys):
+        """Nomes de arquivo com colchetes devem ser exibidos literalmente."""
+        display = Display()
+        display.show_history_list([("notas[bold].json", "2024-01-15T10:30:00", "modelo[x]")])
+
+        captured = capsys.readouterr()
+        assert "notas[bold].json" in captured.out
+        assert "(modelo[x])" in captured.out
+
+    def test_show_history_list_prints_once(self):
+        """Lista vazia ou preenchida deve ser exibida em uma única chamada."""
+        display = Display(console=MagicMock())
+        display.show_history_list([])
+        display.show_history_list([("history_1.json", "2024-01-15T10:30:00", "openai/gpt-4")])
+
+        assert display.console.print.call_count == 2
+
     def test_show_history_list_invalid_timestamp(self, capsys):
         """Verifica fallback para timestamp inválido."""
         display = Display()
@@ -295,7 +555,6 @@ class TestDisplay:
 
         console = Console()
         spinner = RotatingSpinner(console)
-        spinner.start_time = 0
         spinner.update_tokens(42)
 
         renderable = spinner._get_renderable()
@@ -312,23 +571,71 @@ class TestDisplay:
 
         assert display.spinner.running is False
 
-    def test_spinner_thread_is_daemon(self):
-        """Thread do spinner deve ser daemon."""
+    def test_spinner_uses_live_auto_refresh(self):
+        """Spinner deve delegar a animação ao auto-refresh do Live."""
         display = Display()
 
         display.start_spinner()
-        assert display.spinner.thread.daemon is True
+        live = display.spinner.live
+        assert live is not None
+        assert live.auto_refresh is True
+        assert live.vertical_overflow == "crop"
         display.stop_spinner()
 
-    def test_spinner_stop_event_is_set_on_stop(self):
-        """_stop_event deve ser setado ao parar."""
-        display = Display()
+        assert display.spinner.live is None
 
-        display.start_spinner()
-        assert not display.spinner._stop_event.is_set()
+    def test_spinner_hides_cursor_while_running(self):
+        """Cursor deve ficar oculto durante o spinner e voltar ao parar."""
+        from rich.console import Console
 
-        display.stop_spinner()
-        assert display.spinner._stop_event.is_set()
+        console = Console(file=io.StringIO(), force_terminal=True, width=60)
+        spinner = RotatingSpinner(console)
+        spinner.start()
+        spinner.stop()
+
+        output = console.file.getvalue()
+        assert output.index("\x1b[?25l") < output.rindex("\x1b[?25h")
+
+    def test_spinner_frame_derived_from_elapsed_time(self):
+        """Quadro do spinner deve ser calculado a partir do tempo decorrido."""
+        from rich.console import Console
+
+        spinner = RotatingSpinner(Console())
+
+        def frame_at(elapsed):
+            spinner._state = SpinnerState(word_index=0, start_ns=100 * NS - int(elapsed * NS))
+            return str(spinner._get_renderable())
+
+        with patch("utils.display.time.monotonic_ns", return_value=100 * NS):
+            first = frame_at(0.0)
+            second = frame_at(1.5 / SPINNER_REFRESH_RATE)
+            later = frame_at(WORD_CHANGE_INTERVAL + 0.5)
+
+        assert first[0] == spinner.spinner_chars[0]
+        assert second[0] == spinner.spinner_chars[1]
+        assert THINKING_WORDS[0] in first
+        assert THINKING_WORDS[1] in later
+
+    def test_spinner_reuses_renderable_between_frames(self):
+        """O spinner deve atualizar a mesma linha em vez de criar uma nova."""
+        from rich.console import Console
+
+        console = Console(file=io.StringIO(), width=80)
+        spinner = RotatingSpinner(console)
+        spinner._state = SpinnerState(word_index=0, start_ns=50 * NS)
+
+        with patch("utils.display.time.monotonic_ns", return_value=50 * NS + NS // 100):
+            first = spinner._get_renderable()
+            spinner.update_tokens(10)
+            second = spinner._get_renderable()
+
+        assert first is second
+        assert "↓ 10 tokens" in str(second)
+
+        console.print(second)
+        output = console.file.getvalue()
+        assert output.startswith(f"{spinner.spinner_chars[0]} {THINKING_WORDS[0]}…")
+        assert "↓ 10 tokens)" in output
 
     @patch("builtins.input", side_effect=KeyboardInterrupt)
     def test_prompt_input_keyboard_interrupt(self, mock_input, capsys):
@@ -379,16 +686,16 @@ class TestDisplay:
         assert all(isinstance(r, int) for r in results)
 
     def test_spinner_double_start_is_safe(self):
-        """Iniciar spinner duas vezes não deve criar múltiplas threads."""
+        """Iniciar spinner duas vezes não deve criar múltiplos Live."""
         display = Display()
 
         display.start_spinner()
-        first_thread = display.spinner.thread
+        first_live = display.spinner.live
 
         display.start_spinner()
-        second_thread = display.spinner.thread
+        second_live = display.spinner.live
 
-        assert first_thread is second_thread
+        assert first_live is second_live
         assert display.spinner.running is True
 
         display.stop_spinner()
@@ -399,7 +706,6 @@ class TestDisplay:
 
         console = Console()
         spinner = RotatingSpinner(console)
-        spinner.start_time = 0
         spinner.update_tokens(100)
 
         renderable = spinner._get_renderable()
@@ -419,7 +725,7 @@ class TestStreamingTextDisplay:
         streaming = StreamingTextDisplay(console)
 
         assert streaming.running is False
-        assert streaming._buffer == ""
+        assert streaming._chunks == []
 
     def test_add_chunk(self):
         """Verifica se chunks são adicionados."""
@@ -520,6 +826,180 @@ class TestStreamingTextDisplay:
 
         assert isinstance(renderable, Markdown)
 
+    def test_add_chunk_does_not_update_live_directly(self):
+        """add_chunk só acumula; o Live consulta o renderable no refresh."""
+        from unittest.mock import MagicMock
+        from rich.console import Console
+
+        console = Console()
+        streaming = StreamingTextDisplay(console)
+
+        streaming.start()
+        live = streaming.live
+        original_update = live.update
+        live.update = MagicMock()
+        try:
+            streaming.add_chunk("Hello")
+            live.update.assert_not_called()
+            assert streaming.get_full_text() == "Hello"
+        finally:
+            live.update = original_update
+            streaming.stop()
+
+    def test_completed_blocks_are_parsed_once(self):
+        """Blocos completos saem do tail; o texto completo é preservado."""
+        from rich.console import Console
+
+        console = Console()
+        streaming = StreamingTextDisplay(console)
+        streaming.running = True
+
+        streaming.add_chunk("Primeiro parágrafo.\n")
+        streaming.add_chunk("\nSegundo")
+
+        assert [block.text for block in streaming._blocks] == ["Primeiro parágrafo.\n\n"]
+        assert streaming._tail == "Segundo"
+        assert streaming.get_full_text() == "Primeiro parágrafo.\n\nSegundo"
+
+    def test_blank_line_inside_code_fence_does_not_split(self):
+        """Linhas em branco dentro de blocos de código não finalizam bloco."""
+        from rich.console import Console
+
+        console = Console()
+        streaming = StreamingTextDisplay(console)
+        streaming.running = True
+
+        streaming.add_chunk("```python\nx = 1\n\ny = 2\n")
+
+        assert streaming._blocks == []
+
+        streaming.add_chunk("```\n\nFim")
+
+        assert len(streaming._blocks) == 1
+        assert streaming._tail == "Fim"
+
+    def test_char_by_char_stream_splits_like_single_chunk(self):
+        """Varredura incremental deve separar o mesmo prefixo estável de um chunk único."""
+        from rich.console import Console
+
+        text = "Intro\n\n```\ncódigo\n\nmais\n```\n\n- item\n\nFim"
+        whole = StreamingTextDisplay(Console())
+        whole.running = True
+        whole.add_chunk(text)
+
+        incremental = StreamingTextDisplay(Console())
+        incremental.running = True
+        for char in text:
+            incremental.add_chunk(char)
+
+        incremental_text = "".join(b.text for b in incremental._blocks)
+        assert incremental_text == "".join(b.text for b in whole._blocks)
+        assert incremental._tail == whole._tail == "Fim"
+        assert "```\ncódigo\n\nmais\n```\n\n" in [b.text for b in incremental._blocks]
+
+    def test_reference_definition_disables_block_split(self):
+        """Definição de link por referência deve voltar a renderizar o texto inteiro."""
+        from rich.console import Console
+
+        streaming = StreamingTextDisplay(Console())
+        streaming.running = True
+
+        streaming.add_chunk("Veja [docs][ref].\n\n")
+        assert len(streaming._blocks) == 1
+
+        streaming.add_chunk("[ref]: https://example.com\n\nFim")
+
+        assert streaming._blocks == []
+        assert streaming._tail == "Veja [docs][ref].\n\n[ref]: https://example.com\n\nFim"
+
+    def test_completed_block_render_is_cached(self):
+        """Blocos completos devem ser renderizados uma única vez por largura."""
+        from rich.console import Console
+
+        console = Console(file=io.StringIO(), width=60)
+        streaming = StreamingTextDisplay(console)
+        streaming.running = True
+        streaming.add_chunk("# Título\n\nTexto")
+        block = streaming._blocks[0]
+
+        with patch.object(console, "render_lines", wraps=console.render_lines) as render:
+            console.print(streaming._get_renderable())
+            console.print(streaming._get_renderable())
+
+        rendered_block = [c for c in render.call_args_list if "Título" in c.args[0].markup]
+        assert len(rendered_block) == 1
+        assert block._rendered is not None
+
+    def test_full_text_join_is_memoized(self):
+        """O texto completo deve ser reaproveitado até chegar um novo chunk."""
+        from rich.console import Console
+
+        streaming = StreamingTextDisplay(Console())
+        streaming.running = True
+        streaming.add_chunk("Olá")
+        streaming.add_chunk(" mundo")
+
+        first = streaming.get_full_text()
+        assert streaming.get_full_text() is first
+        assert streaming._chunks == ["Olá mundo"]
+
+        streaming.add_chunk("!")
+        assert streaming.get_full_text() == "Olá mundo!"
+
+    def test_live_skips_unchanged_frames(self):
+        """O Live do streaming deve pular refreshes sem chunks novos."""
+        from rich.console import Console
+
+        streaming = StreamingTextDisplay(Console(file=io.StringIO()))
+        streaming.start()
+        try:
+            assert streaming.live._skip_unchanged is True
+        finally:
+            streaming.stop()
+
+    def test_frame_reused_until_new_chunk(self):
+        """Sem chunks novos, o refresh deve reutilizar o frame anterior."""
+        from rich.console import Console
+
+        streaming = StreamingTextDisplay(Console())
+        streaming.running = True
+        streaming.add_chunk("Olá")
+
+        first = streaming._get_renderable()
+        assert streaming._get_renderable() is first
+
+        streaming.add_chunk(" mundo")
+        assert streaming._get_renderable() is not first
+
+    def test_plain_text_skips_markdown_until_syntax(self):
+        """Sem sintaxe Markdown o tail deve ser Text; após '*' passa a Markdown."""
+        from rich.console import Console
+        from rich.text import Text
+        from utils.display import _MarkdownBlock
+
+        streaming = StreamingTextDisplay(Console())
+        streaming.running = True
+        streaming.add_chunk("Olá, tudo")
+        streaming.add_chunk(" bem?")
+
+        tail = streaming._get_renderable().renderables[-1]
+        assert isinstance(tail, Text)
+        assert tail.plain == "Olá, tudo bem?"
+
+        streaming.add_chunk(" **Sim**")
+        assert isinstance(streaming._get_renderable().renderables[-1], _MarkdownBlock)
+
+    def test_markdown_start_detected(self):
+        """Listas no início do texto devem ativar o Markdown."""
+        from rich.console import Console
+        from utils.display import _MarkdownBlock
+
+        streaming = StreamingTextDisplay(Console())
+        streaming.running = True
+        streaming.add_chunk("1")
+
+        assert isinstance(streaming._get_renderable().renderables[-1], _MarkdownBlock)
+
     def test_buffer_truncation_warning(self, capsys):
         """Verifica se aviso de truncamento é exibido."""
         from rich.console import Console
@@ -746,7 +1226,6 @@ class TestConcurrentScenarios:
             for _ in range(100):
                 try:
                     _ = spinner.running
-                    _ = spinner.thread
                     _ = spinner.live
                     _ = spinner._get_renderable()
                 except Exception as e:
@@ -241,8 +241,7 @@ class TestDisplayIntegration:
 
         display.start_spinner()
         assert display.spinner.running is True
-        assert display.spinner.thread is not None
-        assert display.spinner.thread.is_alive()
+        assert display.spinner.live is not None
 
         display.update_spinner_tokens(50)
         assert display.spinner.token_count == 50
@@ -4,12 +4,23 @@ import json
 import logging
 import os
 import tempfile
+import time
 from unittest.mock import patch
 
+import pytest
+
+from utils import logging_config
 from utils.logging_config import (
+    BufferedFileHandler,
+    BytesJSONFileHandler,
     ConsoleFormatter,
+    RecordQueueHandler,
     StructuredFormatter,
+    log_structured,
     setup_logging,
+    _orjson_dumps,
+    _stdlib_dumps,
+    _stdlib_dumps_line,
 )
 
 
@@ -37,7 +48,7 @@ class TestStructuredFormatter:
         assert data["message"] == "Test message"
         assert data["line"] == 42
         assert "timestamp" in data
-        assert data["timestamp"].endswith("+00:00")
+        assert data["timestamp"].endswith("Z")
 
     def test_format_with_exception(self):
         """Verifica formatação com exceção."""
@@ -65,6 +76,33 @@ class TestStructuredFormatter:
         assert "ValueError" in data["exception"]
         assert "Test error" in data["exception"]
 
+    def test_exception_formatted_once_per_record(self):
+        """O traceback deve ser formatado uma vez e reaproveitado via exc_text."""
+        formatter = StructuredFormatter()
+        try:
+            raise ValueError("uma vez")
+        except ValueError:
+            import sys
+            exc_info = sys.exc_info()
+        record = logging.LogRecord(
+            name="test.logger",
+            level=logging.ERROR,
+            pathname="test.py",
+            lineno=1,
+            msg="Erro",
+            args=(),
+            exc_info=exc_info,
+        )
+
+        with patch.object(
+            StructuredFormatter, "formatException", wraps=formatter.formatException
+        ) as format_exception:
+            first = json.loads(formatter.format(record))
+            second = json.loads(StructuredFormatter().format(record))
+
+        assert format_exception.call_count == 1
+        assert first["exception"] == second["exception"] == record.exc_text
+
     def test_format_with_extra_data(self):
         """Verifica formatação com dados extras."""
         formatter = StructuredFormatter()
@@ -84,6 +122,39 @@ class TestStructuredFormatter:
 
         assert data["data"] == {"key": "value"}
 
+    def test_format_with_none_extra_data(self):
+        """extra_data None não deve gerar o campo data."""
+        formatter = StructuredFormatter()
+        record = logging.LogRecord(
+            name="test.logger",
+            level=logging.INFO,
+            pathname="test.py",
+            lineno=1,
+            msg="Test",
+            args=(),
+            exc_info=None,
+        )
+        record.extra_data = None
+
+        data = json.loads(formatter.format(record))
+
+        assert "data" not in data
+
+    def test_format_non_string_message(self):
+        """Mensagens que não são str devem ser convertidas."""
+        formatter = StructuredFormatter()
+        record = logging.LogRecord(
+            name="test.logger",
+            level=logging.INFO,
+            pathname="test.py",
+            lineno=1,
+            msg=ValueError("objeto"),
+            args=(),
+            exc_info=None,
+        )
+
+        assert json.loads(formatter.format(record))["message"] == "objeto"
+
     def test_format_with_message_args(self):
         """Verifica formatação com argumentos na mensagem."""
         formatter = StructuredFormatter()
@@ -102,6 +173,88 @@ class TestStructuredFormatter:
 
         assert data["message"] == "Value: test"
 
+    def test_timestamp_uses_record_created(self):
+        """Timestamp deve vir de record.created, com microssegundos em UTC."""
+        formatter = StructuredFormatter()
+        record = logging.LogRecord(
+            name="test.logger",
+            level=logging.INFO,
+            pathname="test.py",
+            lineno=1,
+            msg="Test",
+            args=(),
+            exc_info=None,
+        )
+        record.created = 1_700_000_000.123456
+
+        data = json.loads(formatter.format(record))
+
+        assert data["timestamp"] == "2023-11-14T22:13:20.123456Z"
+
+    def test_timestamp_prefix_refreshed_each_second(self):
+        """Prefixo em cache deve ser renovado ao mudar de segundo."""
+        formatter = StructuredFormatter()
+
+        assert formatter._timestamp(1_700_000_000.25) == "2023-11-14T22:13:20.250000Z"
+        assert formatter._timestamp(1_700_000_000.75) == "2023-11-14T22:13:20.750000Z"
+        assert formatter._timestamp(1_700_000_061.0) == "2023-11-14T22:14:21.000000Z"
+
+    def test_format_without_orjson(self):
+        """Sem orjson, o json da stdlib deve ser usado."""
+        formatter = StructuredFormatter()
+        record = logging.LogRecord(
+            name="test.logger",
+            level=logging.INFO,
+            pathname="test.py",
+            lineno=1,
+            msg="Ação concluída",
+            args=(),
+            exc_info=None,
+        )
+
+        with patch.object(StructuredFormatter, "_dumps", staticmethod(_stdlib_dumps)):
+            result = formatter.format(record)
+
+        assert json.loads(result)["message"] == "Ação concluída"
+
+    def test_stdlib_dumps_matches_json(self):
+        """Serializador sem orjson deve gerar JSON equivalente e compacto."""
+        data = {
+            "timestamp": "2024-01-15T10:30:00.000000Z",
+            "message": 'Aspas " barra \\ quebra\n ção \x00',
+            "line": 42,
+            "data": {"ok": True, "valor": 1.5, "lista": [None, "á"]},
+        }
+
+        result = _stdlib_dumps(data)
+
+        assert json.loads(result) == data
+        assert result == json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+    def test_orjson_bound_when_available(self):
+        """Com orjson instalado, o serializador deve ser resolvido na importação."""
+        pytest.importorskip("orjson")
+
+        assert StructuredFormatter._dumps is _orjson_dumps
+
+    def test_format_unsupported_extra_data_falls_back(self):
+        """Dados extras não suportados pelo orjson devem usar o json da stdlib."""
+        formatter = StructuredFormatter()
+        record = logging.LogRecord(
+            name="test.logger",
+            level=logging.INFO,
+            pathname="test.py",
+            lineno=1,
+            msg="Test",
+            args=(),
+            exc_info=None,
+        )
+        record.extra_data = {"big": 2 ** 70}
+
+        data = json.loads(formatter.format(record))
+
+        assert data["data"] == {"big": 2 ** 70}
+
 
 class TestConsoleFormatter:
     """Testes para o ConsoleFormatter."""
@@ -180,6 +333,57 @@ class TestConsoleFormatter:
         assert "DEBUG" in result
         assert "\033[36m" in result
 
+    def test_timestamp_uses_record_created(self):
+        """Horário deve vir de record.created, não do relógio atual."""
+        formatter = ConsoleFormatter()
+        record = logging.LogRecord(
+            name="test.logger",
+            level=logging.INFO,
+            pathname="test.py",
+            lineno=1,
+            msg="Test",
+            args=(),
+            exc_info=None,
+        )
+        record.created = 1_700_000_000.5
+        expected = time.strftime("%H:%M:%S", time.localtime(1_700_000_000))
+
+        assert f"[{expected}]" in formatter.format(record)
+
+    def test_line_layout(self):
+        """Linha completa deve manter cor, horário, nível alinhado e mensagem."""
+        formatter = ConsoleFormatter()
+        record = logging.LogRecord(
+            name="test.logger",
+            level=logging.INFO,
+            pathname="test.py",
+            lineno=1,
+            msg="Valor: %s",
+            args=("ok",),
+            exc_info=None,
+        )
+        record.created = 1_700_000_000.0
+        ts = time.strftime("%H:%M:%S", time.localtime(1_700_000_000))
+
+        assert formatter.format(record) == (
+            f"\033[32m[{ts}] INFO    \033[0m test.logger: Valor: ok"
+        )
+
+    def test_unknown_level_uses_reset(self):
+        """Níveis customizados devem usar a cor neutra."""
+        formatter = ConsoleFormatter()
+        record = logging.LogRecord(
+            name="test.logger",
+            level=25,
+            pathname="test.py",
+            lineno=1,
+            msg="Custom",
+            args=(),
+            exc_info=None,
+        )
+
+        assert formatter.format(record).startswith(ConsoleFormatter.RESET)
+
 
 class TestSetupLogging:
     """Testes para a função setup_logging."""
@@ -190,6 +394,7 @@ class TestSetupLogging:
         for handler in root_logger.handlers[:]:
             handler.close()
             root_logger.removeHandler(handler)
+        logging_config._stop_queue_listener()
 
     def test_setup_default_no_handlers(self):
         """Verifica que sem LOG_LEVEL definido, apenas NullHandler é adicionado."""
@@ -223,7 +428,12 @@ class TestSetupLogging:
                 setup_logging()
 
                 root_logger = logging.getLogger()
-                file_handlers = [h for h in root_logger.handlers if isinstance(h, logging.FileHandler)]
+                queue_handlers = [h for h in root_logger.handlers if isinstance(h, RecordQueueHandler)]
+                assert len(queue_handlers) == 1
+                file_handlers = [
+                    h for h in logging_config._queue_listener.handlers
+                    if isinstance(h, logging.FileHandler)
+                ]
                 assert len(file_handlers) == 1
         finally:
             os.unlink(log_file)
@@ -256,6 +466,31 @@ class TestSetupLogging:
             root_logger = logging.getLogger()
             assert root_logger.level == logging.WARNING
 
+    def test_setup_level_name_of_logging_attribute_defaults_to_warning(self):
+        """Atributos do módulo logging que não são níveis devem usar WARNING."""
+        with patch.dict(os.environ, {"LOG_LEVEL": "basicConfig"}, clear=True):
+            setup_logging()
+
+            assert logging.getLogger().level == logging.WARNING
+
+    def test_setup_accepts_logging_level_aliases(self):
+        """Aliases de nível do módulo logging devem ser aceitos."""
+        aliases = {"WARN": logging.WARNING, "fatal": logging.CRITICAL, "NOTSET": logging.NOTSET}
+
+        for name, expected in aliases.items():
+            setup_logging(log_level=name)
+            assert logging.getLogger().level == expected
+
+    def test_setup_follows_environment_changes(self):
+        """Resolução em cache não deve ignorar mudanças nas variáveis de ambiente."""
+        with patch.dict(os.environ, {"LOG_LEVEL": "DEBUG"}, clear=True):
+            setup_logging()
+            assert logging.getLogger().level == logging.DEBUG
+
+        with patch.dict(os.environ, {"LOG_LEVEL": "ERROR"}, clear=True):
+            setup_logging()
+            assert logging.getLogger().level == logging.ERROR
+
     def test_setup_creates_log_directory(self):
         """Verifica que diretório de log é criado se não existir."""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -297,7 +532,317 @@ class TestSetupLogging:
                 setup_logging(log_file=log_file)
 
                 root_logger = logging.getLogger()
-                file_handlers = [h for h in root_logger.handlers if isinstance(h, logging.FileHandler)]
+                queue_handlers = [h for h in root_logger.handlers if isinstance(h, RecordQueueHandler)]
+                assert len(queue_handlers) == 1
+                file_handlers = [
+                    h for h in logging_config._queue_listener.handlers
+                    if isinstance(h, logging.FileHandler)
+                ]
                 assert len(file_handlers) == 1
         finally:
             os.unlink(log_file)
+
+    def test_unopenable_log_file_fails_at_setup(self, tmp_path):
+        """LOG_FILE que não pode ser aberto deve falhar já no setup_logging."""
+        with patch.dict(os.environ, {"LOG_FILE": str(tmp_path)}, clear=True):
+            with pytest.raises(OSError):
+                setup_logging()
+
+        assert logging_config._queue_listener is None
+
+    def test_log_dir_recreated_after_removal(self, tmp_path):
+        """Diretório removido após o primeiro setup deve ser recriado."""
+        log_file = tmp_path / "logs" / "app.log"
+        with patch.dict(os.environ, {}, clear=True):
+            setup_logging(log_file=str(log_file))
+            logging_config._stop_queue_listener()
+            log_file.unlink()
+            log_file.parent.rmdir()
+
+            setup_logging(log_level="ERROR", log_file=str(log_file))
+
+        assert log_file.exists()
+
+    def test_log_dir_created_once(self, tmp_path):
+        """O diretório do log deve ser criado apenas na primeira configuração."""
+        log_file = tmp_path / "logs" / "app.log"
+        with patch.dict(os.environ, {}, clear=True):
+            setup_logging(log_file=str(log_file))
+            assert log_file.parent.is_dir()
+
+            with patch("utils.logging_config.Path.mkdir") as mkdir:
+                setup_logging(log_level="ERROR", log_file=str(log_file))
+
+        mkdir.assert_not_called()
+
+    def test_default_path_creates_no_formatters(self):
+        """Sem nível nem arquivo, nenhum formatter deve ser instanciado."""
+        with patch.dict(os.environ, {}, clear=True), \
+                patch("utils.logging_config.ConsoleFormatter") as console_formatter, \
+                patch("utils.logging_config.StructuredFormatter") as structured_formatter:
+            setup_logging()
+
+        console_formatter.assert_not_called()
+        structured_formatter.assert_not_called()
+        assert [type(h) for h in logging.getLogger().handlers] == [logging.NullHandler]
+
+    def test_reconfigure_closes_previous_handlers(self):
+        """Handlers removidos na reconfiguração devem ser fechados."""
+        previous = logging.NullHandler()
+        failing = logging.NullHandler()
+        root_logger = logging.getLogger()
+        root_logger.addHandler(previous)
+        root_logger.addHandler(failing)
+
+        with patch.object(previous, "close") as close_previous, \
+                patch.object(failing, "close", side_effect=OSError("falha")), \
+                patch.dict(os.environ, {}, clear=True):
+            setup_logging()
+
+        close_previous.assert_called_once()
+        assert previous not in root_logger.handlers
+        assert failing not in root_logger.handlers
+
+    def test_same_config_is_noop(self):
+        """Reconfigurar com a mesma configuração não deve trocar os handlers."""
+        with patch.dict(os.environ, {"LOG_LEVEL": "INFO"}, clear=True):
+            setup_logging()
+            handlers = list(logging.getLogger().handlers)
+
+            with patch("utils.logging_config.logging.StreamHandler") as stream_handler:
+                setup_logging()
+
+        stream_handler.assert_not_called()
+        assert logging.getLogger().handlers == handlers
+
+    def test_same_config_reapplied_after_handlers_removed(self):
+        """Se os handlers foram removidos, a configuração deve ser refeita."""
+        with patch.dict(os.environ, {"LOG_LEVEL": "INFO"}, clear=True):
+            setup_logging()
+            root_logger = logging.getLogger()
+            for handler in root_logger.handlers[:]:
+                root_logger.removeHandler(handler)
+
+            setup_logging()
+
+        assert any(isinstance(h, logging.StreamHandler) for h in root_logger.handlers)
+
+    def test_file_written_by_listener_thread(self, tmp_path):
+        """Registros devem chegar ao arquivo em JSON, com exceção estruturada."""
+        log_file = tmp_path / "app.log"
+        with patch.dict(os.environ, {}, clear=True):
+            setup_logging(log_level="INFO", log_file=str(log_file))
+
+        logger = logging.getLogger("test.queue")
+        try:
+            raise ValueError("falhou")
+        except ValueError:
+            logger.exception("Erro %s", "capturado")
+        logging_config._stop_queue_listener()
+
+        lines = log_file.read_text(encoding="utf-8").splitlines()
+        data = json.loads(lines[-1])
+        assert data["message"] == "Erro capturado"
+        assert "ValueError" in data["exception"]
+        assert data["logger"] == "test.queue"
+
+    def test_listener_file_flushed_without_shutdown(self, tmp_path):
+        """Registros INFO devem chegar ao disco sem parar o listener."""
+        log_file = tmp_path / "app.log"
+        with patch.dict(os.environ, {}, clear=True):
+            setup_logging(log_level="INFO", log_file=str(log_file))
+
+        logging.getLogger("test.queue").info("sem shutdown")
+        deadline = time.monotonic() + 0.5
+        while not log_file.exists() or "sem shutdown" not in log_file.read_text(
+            encoding="utf-8"
+        ):
+            assert time.monotonic() < deadline, "registro não gravado no intervalo"
+            time.sleep(0.01)
+
+    def test_reconfigure_stops_previous_listener(self, tmp_path):
+        """Reconfigurar deve parar o listener anterior e fechar o arquivo."""
+        with patch.dict(os.environ, {}, clear=True):
+            setup_logging(log_file=str(tmp_path / "a.log"))
+            first = logging_config._queue_listener
+            setup_logging(log_file=str(tmp_path / "b.log"))
+
+        assert logging_config._queue_listener is not first
+        assert first._thread is None
+        assert first.handlers[0].stream is None
+
+
+class TestLogStructured:
+    """Testes para o helper log_structured."""
+
+    def test_attaches_extra_data(self, caplog):
+        """Dados nomeados devem virar extra_data no registro."""
+        logger = logging.getLogger("test.structured")
+
+        with caplog.at_level(logging.INFO, logger="test.structured"):
+            log_structured(logger, logging.INFO, "Resposta em %.1fs", 1.5, tokens=42)
+
+        record = caplog.records[-1]
+        assert record.getMessage() == "Resposta em 1.5s"
+        assert record.extra_data == {"tokens": 42}
+        assert record.funcName == "test_attaches_extra_data"
+
+    def test_disabled_level_creates_no_record(self, caplog):
+        """Nível desativado não deve gerar registro."""
+        logger = logging.getLogger("test.structured")
+
+        with caplog.at_level(logging.WARNING, logger="test.structured"):
+            log_structured(logger, logging.DEBUG, "Ignorado", tokens=1)
+
+        assert caplog.records == []
+
+
+class TestBufferedFileHandler:
+    """Testes para o BufferedFileHandler."""
+
+    def _record(self, level: int, msg: str) -> logging.LogRecord:
+        return logging.LogRecord(
+            name="test.logger",
+            level=level,
+            pathname="test.py",
+            lineno=1,
+            msg=msg,
+            args=(),
+            exc_info=None,
+        )
+
+    def test_file_opened_on_first_record(self, tmp_path):
+        """O arquivo só deve ser criado no primeiro registro."""
+        log_file = tmp_path / "app.log"
+        handler = BufferedFileHandler(log_file)
+        try:
+            assert not log_file.exists()
+            handler.handle(self._record(logging.INFO, "primeiro"))
+            assert log_file.exists()
+        finally:
+            handler.close()
+
+    def test_records_buffered_until_flush(self, tmp_path):
+        """Registros abaixo de ERROR devem ficar no buffer até o flush."""
+        log_file = tmp_path / "app.log"
+        handler = BufferedFileHandler(log_file, flush_interval=60)
+        try:
+            handler.handle(self._record(logging.INFO, "em buffer"))
+            assert log_file.read_text(encoding="utf-8") == ""
+
+            handler.flush()
+            assert "em buffer" in log_file.read_text(encoding="utf-8")
+        finally:
+            handler.close()
+
+    def test_info_reaches_disk_within_flush_interval(self, tmp_path):
+        """Sem novos registros, o buffer deve ir para o disco em ~flush_interval."""
+        log_file = tmp_path / "app.log"
+        handler = BufferedFileHandler(log_file, flush_interval=0.1)
+        try:
+            handler.handle(self._record(logging.INFO, "periódico"))
+            deadline = time.monotonic() + 0.5
+            while "periódico" not in log_file.read_text(encoding="utf-8"):
+                assert time.monotonic() < deadline, "registro não gravado no intervalo"
+                time.sleep(0.01)
+        finally:
+            handler.close()
+
+    def test_error_flushed_immediately(self, tmp_path):
+        """Registros ERROR devem ir para o disco na hora."""
+        log_file = tmp_path / "app.log"
+        handler = BufferedFileHandler(log_file)
+        try:
+            handler.handle(self._record(logging.INFO, "antes"))
+            handler.handle(self._record(logging.ERROR, "falha"))
+
+            content = log_file.read_text(encoding="utf-8")
+            assert "antes" in content
+            assert "falha" in content
+        finally:
+            handler.close()
+
+    def test_close_writes_pending_records(self, tmp_path):
+        """close() deve gravar o que estiver no buffer."""
+        log_file = tmp_path / "app.log"
+        handler = BufferedFileHandler(log_file)
+        handler.handle(self._record(logging.WARNING, "pendente"))
+        handler.close()
+
+        assert "pendente" in log_file.read_text(encoding="utf-8")
+
+    def test_listener_survives_unopenable_file(self, tmp_path):
+        """Falha ao abrir o arquivo não deve matar a thread do listener."""
+        import queue
+        from logging.handlers import QueueListener
+
+        handler = BufferedFileHandler(tmp_path)
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, handler)
+        listener.start()
+        try:
+            with patch.object(handler, "handleError") as handle_error:
+                log_queue.put(self._record(logging.INFO, "primeiro"))
+                log_queue.put(self._record(logging.INFO, "segundo"))
+                deadline = time.monotonic() + 1.0
+                while handle_error.call_count < 2:
+                    assert time.monotonic() < deadline, "listener parou de consumir a fila"
+                    time.sleep(0.01)
+
+            assert listener._thread.is_alive()
+            assert log_queue.empty()
+        finally:
+            listener.stop()
+            handler.close()
+
+
+class TestBytesJSONFileHandler:
+    """Testes para o BytesJSONFileHandler."""
+
+    def _record(self, msg: str) -> logging.LogRecord:
+        return logging.LogRecord(
+            name="test.logger",
+            level=logging.INFO,
+            pathname="test.py",
+            lineno=1,
+            msg=msg,
+            args=(),
+            exc_info=None,
+        )
+
+    def test_writes_json_lines_as_bytes(self, tmp_path):
+        """Com StructuredFormatter, cada registro deve ser uma linha JSON UTF-8."""
+        log_file = tmp_path / "app.log"
+        handler = BytesJSONFileHandler(log_file)
+        handler.setFormatter(StructuredFormatter())
+        try:
+            handler.handle(self._record("Olá"))
+            handler.handle(self._record("Ação"))
+        finally:
+            handler.close()
+
+        lines = log_file.read_bytes().split(b"\n")
+        assert lines[-1] == b""
+        assert [json.loads(line)["message"] for line in lines[:-1]] == ["Olá", "Ação"]
+
+    def test_stdlib_line_matches_format(self):
+        """Sem orjson, a linha em bytes deve equivaler ao format() mais \\n."""
+        formatter = StructuredFormatter()
+        record = self._record("Ação")
+        record.created = 1_700_000_000.0
+
+        with patch.object(StructuredFormatter, "_dumps", staticmethod(_stdlib_dumps)), \
+                patch.object(StructuredFormatter, "_dumps_line", staticmethod(_stdlib_dumps_line)):
+            assert formatter.format_line(record) == (formatter.format(record) + "\n").encode()
+
+    def test_other_formatter_encoded(self, tmp_path):
+        """Formatters que não são JSON devem ser codificados em UTF-8."""
+        log_file = tmp_path / "app.log"
+        handler = BytesJSONFileHandler(log_file)
+        handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+        try:
+            handler.handle(self._record("Ação"))
+        finally:
+            handler.close()
+
+        assert log_file.read_text(encoding="utf-8") == "INFO Ação\n"
@@ -10,7 +10,7 @@ import time
 import uuid
 from dataclasses import dataclass
 import httpx
-from typing import Any, Generator, Self
+from typing import Any, Generator, Self, Sequence
 from .config import config, MAX_MESSAGE_CONTENT_SIZE
 from .version import __version__
 
@@ -294,7 +294,7 @@ class OpenRouterClient:
             time.sleep(backoff)
         return retry_after, should_retry
 
-    def _validate_messages(self, messages: list[dict[str, str]]) -> None:
+    def _validate_messages(self, messages: Sequence[dict[str, str]]) -> None:
         """Valida estrutura das mensagens antes de enviar à API."""
         if not messages:
             raise APIError("Lista de mensagens não pode estar vazia.")
@@ -316,7 +316,7 @@ class OpenRouterClient:
                 )
 
     def _prepare_request(
-        self, messages: list[dict[str, str]], stream: bool = False
+        self, messages: Sequence[dict[str, str]], stream: bool = False
     ) -> dict[str, Any]:
         """Prepara e valida requisição para a API."""
         if not self._api_key:
@@ -382,12 +382,12 @@ class OpenRouterClient:
 
         return False, APIError(f"Erro de rede: {error}")
 
-    def send_message(self, messages: list[dict[str, str]]) -> APIResponse:
+    def send_message(self, messages: Sequence[dict[str, str]]) -> APIResponse:
         """
         Envia mensagens para a API e retorna a resposta.
 
         Args:
-            messages: Lista de mensagens no formato OpenAI.
+            messages: Sequência de mensagens no formato OpenAI.
 
         Returns:
             APIResponse com o texto e contagem de tokens.
@@ -446,13 +446,13 @@ class OpenRouterClient:
             self._end_request()
 
     def send_message_stream(
-        self, messages: list[dict[str, str]]
+        self, messages: Sequence[dict[str, str]]
     ) -> StreamingResponse:
         """
         Envia mensagens para a API e retorna a resposta em streaming.
 
         Args:
-            messages: Lista de mensagens no formato OpenAI.
+            messages: Sequência de mensagens no formato OpenAI.
 
         Returns:
             StreamingResponse iterável que produz chunks de texto.
@@ -26,18 +26,22 @@ class ConfigurationError(Exception):
 _T = TypeVar("_T")
 
 
+_DEFAULT_INIT_LOCK = threading.RLock()
+
+
 class _ThreadSafeCachedProperty:
     """Descriptor que implementa cached_property com thread-safety.
 
-    Usa um lock para garantir que a avaliação inicial seja atômica,
-    evitando race conditions quando múltiplas threads acessam a
-    propriedade pela primeira vez simultaneamente.
+    Usa o lock de inicialização da instância (`_init_lock`) para garantir
+    que a avaliação inicial seja atômica, evitando race conditions quando
+    múltiplas threads acessam a propriedade pela primeira vez
+    simultaneamente. Classes sem `_init_lock` compartilham um lock de
+    módulo.
     """
 
     def __init__(self, func: Callable[[Any], _T]) -> None:
         self.func: Callable[[Any], _T] = func
         self.attr_name: str | None = None
-        self.lock: threading.Lock = threading.Lock()
 
     def __set_name__(self, owner: type, name: str) -> None:
         self.attr_name = name
@@ -51,7 +55,7 @@ class _ThreadSafeCachedProperty:
         except KeyError:
             pass
 
-        with self.lock:
+        with getattr(instance, "_init_lock", _DEFAULT_INIT_LOCK):
             try:
                 return instance.__dict__[self.attr_name]
             except KeyError:
@@ -64,9 +68,13 @@ class Config:
     """Classe de configuração do chatbot com avaliação lazy e thread-safe.
 
     Usa _ThreadSafeCachedProperty para garantir que a avaliação inicial
-    de cada propriedade seja atômica, evitando race conditions.
+    de cada propriedade seja atômica, evitando race conditions. Todas as
+    propriedades compartilham um único lock reentrante por instância.
     """
 
+    def __init__(self) -> None:
+        self._init_lock = threading.RLock()
+
     def __repr__(self) -> str:
         return f"Config(model={self.OPENROUTER_MODEL})"
 
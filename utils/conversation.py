@@ -1,14 +1,26 @@
 """Gerenciamento do histórico de conversas."""
 
+import functools
 import json
 import logging
 import os
 import re
-import shutil
+import sys
 import tempfile
+from collections import deque
 from datetime import datetime
 from pathlib import Path
-from typing import TypedDict
+from typing import Any, TypedDict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None  # type: ignore
 
 from .config import config, MAX_MESSAGE_CONTENT_SIZE
 
@@ -16,9 +28,35 @@ __all__ = ["ConversationManager", "ConversationLoadError", "Message"]
 
 MAX_HISTORY_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 
+# Canonical role strings shared by every stored message
+ROLE_SYSTEM = sys.intern("system")
+ROLE_USER = sys.intern("user")
+ROLE_ASSISTANT = sys.intern("assistant")
+
+# Roles accepted in saved histories, mapped to their canonical string
+_HISTORY_ROLES: dict[str, str] = {ROLE_USER: ROLE_USER, ROLE_ASSISTANT: ROLE_ASSISTANT}
+
+# Supported history file formats and their extensions
+HISTORY_FORMATS: dict[str, str] = {"json": ".json", "msgpack": ".msgpack"}
+
+# Translation table and patterns used to sanitize history filenames
+_UNSAFE_FILENAME_TABLE = str.maketrans(
+    dict.fromkeys('<>:"/\\|?*' + ''.join(map(chr, range(0x20))), '_')
+)
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
 logger = logging.getLogger(__name__)
 
 
+def _strip_extensions(name: str) -> str:
+    """Remove todas as extensões finais (ex.: .json, .bak, .json.bak) em tempo linear."""
+    while True:
+        head, dot, tail = name.rpartition('.')
+        if not dot or not tail or not tail.isascii() or not tail.isalnum():
+            return name
+        name = head
+
+
 class Message(TypedDict):
     """Estrutura de uma mensagem no formato OpenAI."""
 
@@ -30,74 +68,138 @@ class ConversationLoadError(Exception):
     """Erro ao carregar conversa de arquivo."""
 
 
+def _validate_message_content(content: str) -> None:
+    """Valida o conteúdo de uma mensagem."""
+    if not isinstance(content, str):
+        raise TypeError("Conteúdo da mensagem deve ser uma string")
+    if len(content) > MAX_MESSAGE_CONTENT_SIZE:
+        raise ValueError(
+            f"Mensagem excede tamanho máximo ({MAX_MESSAGE_CONTENT_SIZE} caracteres)"
+        )
+
+
+def _history_format(filename: str) -> str:
+    """Detecta o formato do histórico pela extensão do arquivo."""
+    if filename.lower().endswith(HISTORY_FORMATS["msgpack"]):
+        return "msgpack"
+    return "json"
+
+
+def _dump_history(history: dict[str, Any], file_format: str = "json") -> bytes:
+    """Serializa o histórico no formato indicado.
+
+    JSON é gerado em UTF-8: indentado via orjson se disponível, ou compacto
+    com o json da stdlib, cujo modo indentado é implementado em Python puro.
+    MessagePack requer o pacote msgspec.
+    """
+    if file_format == "msgpack":
+        if msgspec is None:
+            raise ValueError("Formato msgpack requer o pacote msgspec")
+        return msgspec.msgpack.encode(history)
+    if orjson is not None:
+        return orjson.dumps(history, option=orjson.OPT_INDENT_2)
+    return json.dumps(history, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _load_history(raw: bytes, file_format: str = "json") -> Any:
+    """Desserializa o conteúdo de um arquivo de histórico."""
+    if file_format == "msgpack":
+        if msgspec is None:
+            raise ValueError("Formato msgpack requer o pacote msgspec")
+        try:
+            return msgspec.msgpack.decode(raw)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+    return json.loads(raw)
+
+
+@functools.cache
+def _compute_system_prompt() -> str:
+    """Constrói o system prompt com as configurações de personalização.
+
+    A configuração não muda em tempo de execução, então o resultado é
+    calculado uma única vez por processo (veja ConversationManager.reload_prompt).
+    """
+    parts = [config.SYSTEM_PROMPT]
+
+    instructions = []
+    if config.RESPONSE_LANGUAGE:
+        instructions.append(f"Responda em {config.RESPONSE_LANGUAGE}")
+    if config.RESPONSE_LENGTH:
+        instructions.append(f"seja {config.RESPONSE_LENGTH} nas respostas")
+    if config.RESPONSE_TONE:
+        instructions.append(f"use tom {config.RESPONSE_TONE}")
+    if config.RESPONSE_FORMAT:
+        if config.RESPONSE_FORMAT.lower() == "markdown":
+            instructions.append("use formatação markdown quando apropriado")
+        else:
+            instructions.append("use apenas texto simples sem formatação")
+
+    if instructions:
+        parts.append(". ".join(instructions) + ".")
+
+    return " ".join(parts)
+
+
 class ConversationManager:
     """Gerencia o histórico de mensagens da conversa."""
 
-    def __init__(self) -> None:
-        self.messages: list[Message] = []
-        self.system_prompt = self._build_system_prompt()
-        self._init_system_message()
-
     def __repr__(self) -> str:
-        return f"ConversationManager(messages={len(self.messages)})"
-
-    def _build_system_prompt(self) -> str:
-        """Constrói o system prompt com as configurações de personalização."""
-        parts = [config.SYSTEM_PROMPT]
-
-        instructions = []
-        if config.RESPONSE_LANGUAGE:
-            instructions.append(f"Responda em {config.RESPONSE_LANGUAGE}")
-        if config.RESPONSE_LENGTH:
-            instructions.append(f"seja {config.RESPONSE_LENGTH} nas respostas")
-        if config.RESPONSE_TONE:
-            instructions.append(f"use tom {config.RESPONSE_TONE}")
-        if config.RESPONSE_FORMAT:
-            if config.RESPONSE_FORMAT.lower() == "markdown":
-                instructions.append("use formatação markdown quando apropriado")
-            else:
-                instructions.append("use apenas texto simples sem formatação")
-
-        if instructions:
-            parts.append(". ".join(instructions) + ".")
-
-        return " ".join(parts)
-
-    def _init_system_message(self) -> None:
-        """Inicializa com a mensagem de sistema."""
-        self.messages = [{"role": "system", "content": self.system_prompt}]
-
-    def _enforce_history_limit(self) -> None:
-        """Mantém apenas os N pares de mensagens mais recentes + system prompt.
-
-        MAX_HISTORY_SIZE representa o número de pares de conversa (usuário + assistente).
-        O limite real de mensagens individuais é MAX_HISTORY_SIZE * 2.
+        return f"ConversationManager(messages={len(self._history) + 1})"
+
+    @functools.cached_property
+    def history_dir(self) -> Path:
+        """Diretório de histórico, resolvido uma vez por instância."""
+        return Path(config.HISTORY_DIR)
+
+    @property
+    def messages(self) -> tuple[Message, ...]:
+        """System prompt seguido das mensagens da conversa (somente leitura).
+
+        Retorna uma tupla nova a cada acesso, para que tentativas de
+        modificação falhem em vez de se perderem em uma cópia; use
+        add_user_message/add_assistant_message para alterar o histórico.
         """
-        max_messages = config.MAX_HISTORY_SIZE * 2
-        if len(self.messages) > max_messages + 1:
-            self.messages = [self.messages[0]] + self.messages[-(max_messages):]
-
-    def _validate_message_content(self, content: str) -> None:
-        """Valida o conteúdo de uma mensagem."""
-        if not isinstance(content, str):
-            raise TypeError("Conteúdo da mensagem deve ser uma string")
-        if len(content) > MAX_MESSAGE_CONTENT_SIZE:
-            raise ValueError(
-                f"Mensagem excede tamanho máximo ({MAX_MESSAGE_CONTENT_SIZE} caracteres)"
-            )
+        return (self._system_message, *self._history)
+
+    @functools.cached_property
+    def system_prompt(self) -> str:
+        """System prompt, construído apenas quando necessário."""
+        return _compute_system_prompt()
+
+    @classmethod
+    def reload_prompt(cls) -> None:
+        """Descarta o system prompt em cache após mudanças na configuração.
+
+        Afeta apenas instâncias que ainda não acessaram system_prompt.
+        """
+        _compute_system_prompt.cache_clear()
+
+    @functools.cached_property
+    def _system_message(self) -> Message:
+        """Mensagem de sistema, mantida fora do histórico limitado."""
+        return {"role": ROLE_SYSTEM, "content": self.system_prompt}
+
+    @functools.cached_property
+    def _history(self) -> deque[Message]:
+        """Mensagens de usuário e assistente, sem o system prompt.
+
+        MAX_HISTORY_SIZE representa o número de pares de conversa (usuário +
+        assistente), então o deque guarda até MAX_HISTORY_SIZE * 2 mensagens
+        e descarta as mais antigas automaticamente.
+        """
+        return deque(maxlen=config.MAX_HISTORY_SIZE * 2)
 
     def add_user_message(self, content: str) -> None:
         """Adiciona uma mensagem do usuário."""
-        self._validate_message_content(content)
-        self.messages.append({"role": "user", "content": content})
-        self._enforce_history_limit()
+        _validate_message_content(content)
+        self._history.append({"role": ROLE_USER, "content": content})
         logger.debug("Mensagem do usuário adicionada (%d chars)", len(content))
 
     def add_assistant_message(self, content: str) -> None:
         """Adiciona uma mensagem do assistente."""
-        self._validate_message_content(content)
-        self.messages.append({"role": "assistant", "content": content})
-        self._enforce_history_limit()
+        _validate_message_content(content)
+        self._history.append({"role": ROLE_ASSISTANT, "content": content})
         logger.debug("Mensagem do assistente adicionada (%d chars)", len(content))
 
     def remove_last_user_message(self) -> str | None:
@@ -107,58 +209,79 @@ class ConversationManager:
         Returns:
             Conteúdo da mensagem removida ou None se não houver.
         """
-        for i in range(len(self.messages) - 1, -1, -1):
-            if self.messages[i]["role"] == "user":
-                removed = self.messages.pop(i)
+        history = self._history
+        # Caso comum (erro antes da resposta): a mensagem do usuário é a última
+        if history and history[-1]["role"] == ROLE_USER:
+            return history.pop()["content"]
+        for i in range(len(history) - 2, -1, -1):
+            if history[i]["role"] == ROLE_USER:
+                removed = history[i]
+                del history[i]
                 return removed["content"]
         return None
 
-    def get_messages(self) -> list[Message]:
-        """Retorna uma cópia de todas as mensagens."""
-        return self.messages.copy()
+    def get_messages(self) -> tuple[Message, ...]:
+        """Retorna um snapshot imutável de todas as mensagens.
+
+        A tupla não reflete alterações posteriores no histórico e não pode
+        ser modificada pelo chamador.
+        """
+        return (self._system_message, *self._history)
 
     def clear(self) -> None:
         """Limpa o histórico, mantendo apenas o system prompt."""
-        self._init_system_message()
+        self._history.clear()
 
     def get_history_for_display(self) -> list[Message]:
         """Retorna o histórico sem a mensagem de sistema."""
-        return [msg for msg in self.messages if msg["role"] != "system"]
+        return list(self._history)
 
-    def _sanitize_filename(self, filename: str) -> str:
+    def _sanitize_filename(self, filename: str, extension: str = ".json") -> str:
         """Remove caracteres perigosos do nome do arquivo."""
         basename = os.path.basename(filename)
-        sanitized = re.sub(r'[<>:"/\\|?*\x00-\x1f]', '_', basename)
-        sanitized = re.sub(r'\s+', '_', sanitized)
-        # Remove all extensions (e.g., .json, .bak, .json.bak)
-        while re.search(r'\.[a-zA-Z0-9]+$', sanitized):
-            sanitized = re.sub(r'\.[a-zA-Z0-9]+$', '', sanitized)
+        sanitized = basename.translate(_UNSAFE_FILENAME_TABLE)
+        sanitized = _WHITESPACE_PATTERN.sub('_', sanitized)
+        sanitized = _strip_extensions(sanitized)
         sanitized = sanitized.strip('._')
         if not sanitized:
             sanitized = "history"
-        return sanitized + '.json'
+        return sanitized + extension
 
-    def save_to_file(self, filename: str | None = None) -> str:
+    def save_to_file(
+        self, filename: str | None = None, file_format: str | None = None
+    ) -> str:
         """
-        Salva o histórico em um arquivo JSON.
+        Salva o histórico em um arquivo JSON ou MessagePack.
 
         Args:
             filename: Nome do arquivo. Se None, gera automaticamente.
+            file_format: 'json' ou 'msgpack'. Se None, usa a extensão do
+                         nome do arquivo (padrão: json).
 
         Returns:
             Caminho do arquivo salvo.
 
         Raises:
+            ValueError: Se o formato não for suportado ou exigir msgspec
+                        sem o pacote instalado.
             IOError: Em caso de erro ao salvar.
         """
-        save_dir = Path(config.HISTORY_DIR)
+        if file_format is None:
+            file_format = _history_format(filename or "")
+        if file_format not in HISTORY_FORMATS:
+            raise ValueError(f"Formato de histórico inválido: {file_format}")
+        if file_format == "msgpack" and msgspec is None:
+            raise ValueError("Formato msgpack requer o pacote msgspec")
+        extension = HISTORY_FORMATS[file_format]
+
+        save_dir = self.history_dir
         save_dir.mkdir(exist_ok=True, mode=0o700)
 
         if filename is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"history_{timestamp}.json"
+            filename = f"history_{timestamp}{extension}"
 
-        safe_filename = self._sanitize_filename(filename)
+        safe_filename = self._sanitize_filename(filename, extension)
         filepath = save_dir / safe_filename
 
         history = {
@@ -168,13 +291,14 @@ class ConversationManager:
         }
 
         try:
-            fd, tmp_path = tempfile.mkstemp(suffix='.json', dir=save_dir)
+            # O sufixo .tmp evita que o arquivo parcial apareça em list_history_files
+            fd, tmp_path = tempfile.mkstemp(suffix=extension + ".tmp", dir=save_dir)
             try:
-                with os.fdopen(fd, 'w', encoding='utf-8') as f:
-                    json.dump(history, f, ensure_ascii=False, indent=2)
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(_dump_history(history, file_format))
                     f.flush()
                     os.fsync(f.fileno())
-                shutil.move(tmp_path, filepath)
+                os.replace(tmp_path, filepath)
             except Exception:
                 try:
                     if os.path.exists(tmp_path):
@@ -190,7 +314,7 @@ class ConversationManager:
 
     def message_count(self) -> int:
         """Retorna o número de mensagens (excluindo system)."""
-        return sum(1 for msg in self.messages if msg["role"] != "system")
+        return len(self._history)
 
     def list_history_files(self, limit: int = 100) -> list[tuple[str, str, str]]:
         """
@@ -202,41 +326,52 @@ class ConversationManager:
         Returns:
             Lista de tuplas (nome_arquivo, timestamp, modelo) ordenada por data.
         """
-        history_dir = Path(config.HISTORY_DIR)
+        history_dir = self.history_dir
 
         if not history_dir.exists():
             return []
 
         files = []
-        for filepath in history_dir.glob("*.json"):
-            try:
-                if filepath.is_symlink():
-                    logger.debug("Symlink ignorado: %s", filepath)
+        with os.scandir(history_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".json"):
+                    file_format = "json"
+                elif entry.name.endswith(".msgpack") and msgspec is not None:
+                    file_format = "msgpack"
+                else:
                     continue
-                if filepath.stat().st_size > MAX_HISTORY_FILE_SIZE:
-                    logger.debug("Arquivo muito grande ignorado: %s", filepath)
+                try:
+                    if entry.is_symlink():
+                        logger.debug("Symlink ignorado: %s", entry.path)
+                        continue
+                    if entry.stat(follow_symlinks=False).st_size > MAX_HISTORY_FILE_SIZE:
+                        logger.debug("Arquivo muito grande ignorado: %s", entry.path)
+                        continue
+                    with open(entry.path, "rb") as f:
+                        data = _load_history(f.read(), file_format)
+                    if not isinstance(data, dict):
+                        logger.debug("Arquivo inválido ignorado: %s", entry.path)
+                        continue
+                    timestamp = data.get("timestamp", "Desconhecido")
+                    model = data.get("model", "Desconhecido")
+                    files.append((entry.name, timestamp, model))
+                except ValueError:
+                    logger.debug("Arquivo inválido ignorado: %s", entry.path)
+                    continue
+                except OSError as e:
+                    logger.warning("Erro ao ler arquivo de histórico %s: %s", entry.path, e)
                     continue
-                with open(filepath, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                timestamp = data.get("timestamp", "Desconhecido")
-                model = data.get("model", "Desconhecido")
-                files.append((filepath.name, timestamp, model))
-            except json.JSONDecodeError:
-                logger.debug("JSON inválido ignorado: %s", filepath)
-                continue
-            except OSError as e:
-                logger.warning("Erro ao ler arquivo de histórico %s: %s", filepath, e)
-                continue
 
         files.sort(key=lambda x: x[1], reverse=True)
         return files[:limit]
 
     def load_from_file(self, filename: str) -> int:
         """
-        Carrega histórico de conversa de um arquivo JSON.
+        Carrega histórico de conversa de um arquivo JSON ou MessagePack.
 
         Args:
             filename: Nome do arquivo (sempre relativo ao HISTORY_DIR).
+                      O formato é detectado pela extensão.
 
         Returns:
             Número de mensagens carregadas.
@@ -244,8 +379,11 @@ class ConversationManager:
         Raises:
             ConversationLoadError: Se arquivo inválido ou não encontrado.
         """
-        safe_filename = self._sanitize_filename(Path(filename).name)
-        path = Path(config.HISTORY_DIR) / safe_filename
+        file_format = _history_format(filename)
+        safe_filename = self._sanitize_filename(
+            Path(filename).name, HISTORY_FORMATS[file_format]
+        )
+        path = self.history_dir / safe_filename
 
         if not path.exists():
             logger.warning("Tentativa de carregar arquivo inexistente: %s", path)
@@ -267,10 +405,12 @@ class ConversationManager:
             )
 
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except json.JSONDecodeError as e:
-            raise ConversationLoadError(f"Arquivo JSON inválido: {e}") from e
+            with open(path, "rb") as f:
+                data = _load_history(f.read(), file_format)
+        except ValueError as e:
+            raise ConversationLoadError(
+                f"Arquivo {file_format.upper()} inválido: {e}"
+            ) from e
         except OSError as e:
             raise ConversationLoadError(f"Erro ao ler arquivo: {e}") from e
 
@@ -289,7 +429,8 @@ class ConversationManager:
                 raise ConversationLoadError(f"Mensagem {i} inválida: esperado objeto")
             if "role" not in msg or "content" not in msg:
                 raise ConversationLoadError(f"Mensagem {i} sem 'role' ou 'content'")
-            if msg["role"] not in ("user", "assistant"):
+            role = msg["role"]
+            if not isinstance(role, str) or role not in _HISTORY_ROLES:
                 raise ConversationLoadError(f"Mensagem {i} com role inválido: {msg['role']}")
             content = msg.get("content")
             if not isinstance(content, str):
@@ -297,10 +438,10 @@ class ConversationManager:
             if len(content) > MAX_MESSAGE_CONTENT_SIZE:
                 raise ConversationLoadError(f"Mensagem {i} excede tamanho máximo")
 
-        self._init_system_message()
-        for msg in messages:
-            self.messages.append({"role": msg["role"], "content": msg["content"]})
-
-        self._enforce_history_limit()
+        self._history.clear()
+        self._history.extend(
+            {"role": _HISTORY_ROLES[msg["role"]], "content": msg["content"]}
+            for msg in messages
+        )
         logger.info("Histórico carregado: %s (%d mensagens)", path, len(messages))
         return len(messages)
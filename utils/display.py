@@ -1,30 +1,69 @@
 """Formatação e exibição no terminal."""
 
+import copy
+import functools
 import logging
 import random
+import re
+import sys
 import time
 import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from rich.console import Console, ConsoleOptions, Group, RenderResult
+from rich.control import Control
+from rich.segment import ControlType, Segment
+from rich.style import Style
+from rich.text import Text
+
 
-try:
-    import readline
-    HAS_READLINE = True
-except ImportError:
+def _stdin_is_tty() -> bool:
+    """Indica se a entrada padrão é um terminal interativo."""
     try:
-        import pyreadline3 as readline  # type: ignore
+        return sys.stdin is not None and sys.stdin.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+# readline só é útil para entrada interativa; fora de um TTY (testes, CI,
+# entrada redirecionada) a importação e a inicialização são evitadas.
+readline = None  # type: ignore
+HAS_READLINE = False
+if _stdin_is_tty():
+    try:
+        import readline
         HAS_READLINE = True
     except ImportError:
-        readline = None  # type: ignore
-        HAS_READLINE = False
-from datetime import datetime
-from rich.console import Console
-from rich.markdown import Markdown
-from rich.live import Live
-from rich.text import Text
-
-__all__ = ["Display", "RotatingSpinner", "StreamingTextDisplay", "THINKING_WORDS", "ChatCompleter"]
+        try:
+            import pyreadline3 as readline  # type: ignore
+            HAS_READLINE = True
+        except ImportError:
+            pass
+
+
+# rich.markdown (e markdown-it) domina o custo de importar o Rich; Markdown e
+# Live são importados no primeiro uso para não atrasar a inicialização.
+if TYPE_CHECKING:
+    from markdown_it import MarkdownIt
+    from rich.live import Live
+    from rich.markdown import Markdown
+
+__all__ = [
+    "Display",
+    "RotatingSpinner",
+    "SpinnerState",
+    "StreamingTextDisplay",
+    "THINKING_WORDS",
+    "ChatCompleter",
+]
 
 logger = logging.getLogger(__name__)
 
+# Console compartilhado: a detecção do terminal é feita uma única vez
+_CONSOLE: Console = Console()
+
 
 class ChatCompleter:
     """Autocompleção para comandos do chatbot."""
@@ -81,9 +120,33 @@ class ChatCompleter:
 SPINNER_REFRESH_RATE = 12  # Hz - taxa de atualização do spinner
 STREAMING_REFRESH_RATE = 10  # Hz - taxa de atualização do streaming
 WORD_CHANGE_INTERVAL = 5.0  # segundos - intervalo entre rotação de palavras
-ANIMATION_FRAME_INTERVAL = 0.08  # segundos - atraso entre frames da animação
-THREAD_JOIN_TIMEOUT = 0.2  # segundos - tempo máximo para encerrar thread
+_NS_PER_SECOND = 1_000_000_000
 MAX_BUFFER_SIZE = 1_000_000  # bytes - limite máximo do buffer de streaming
+BEGIN_SYNCHRONIZED_UPDATE = "\x1b[?2026h"  # DEC mode 2026
+END_SYNCHRONIZED_UPDATE = "\x1b[?2026l"
+
+BANNER_MARKUP = """[bold cyan]
+    ████████╗██╗ ██████╗    ██████╗  ██████╗ ████████╗    ██╗  ██╗██████╗
+    ╚══██╔══╝██║██╔════╝    ██╔══██╗██╔═══██╗╚══██╔══╝    ██║  ██║╚════██╗
+       ██║   ██║██║         ██████╔╝██║   ██║   ██║       ███████║ █████╔╝
+       ██║   ██║██║         ██╔══██╗██║   ██║   ██║       ╚════██║ ╚═══██╗
+       ██║   ██║╚██████╗    ██████╔╝╚██████╔╝   ██║            ██║██████╔╝
+       ╚═╝   ╚═╝ ╚═════╝    ╚═════╝  ╚═════╝    ╚═╝            ╚═╝╚═════╝[/bold cyan]
+
+    [bold magenta]>[/bold magenta] [bold white]Chatbot Conversacional com IA Generativa[/bold white]
+    [bold yellow]>[/bold yellow] [italic]Powered by Vertex[/italic]
+"""
+
+HELP_COMMANDS: list[tuple[str, str]] = [
+    ("sair, exit, quit", "Encerra o chatbot"),
+    ("/limpar, /clear", "Limpa o histórico da conversa"),
+    ("/salvar, /save [nome]", "Salva o histórico em arquivo"),
+    ("/listar, /list", "Lista históricos salvos"),
+    ("/carregar, /load <arquivo>", "Carrega histórico de arquivo"),
+    ("/ajuda, /help", "Mostra esta mensagem"),
+    ("/modelo, /model [nome]", "Mostra ou altera o modelo atual"),
+    ("/streaming, /stream", "Alterna modo streaming on/off"),
+]
 
 THINKING_WORDS: list[str] = [
     "Pensando",
@@ -105,46 +168,257 @@ THINKING_WORDS: list[str] = [
 ]
 
 
+def _build_help() -> Text:
+    """Monta o texto estático da ajuda."""
+    help_text = Text("\n")
+    help_text.append("Comandos disponíveis:", style="bold dim")
+    help_text.append("\n\n")
+    for cmd, desc in HELP_COMMANDS:
+        help_text.append(f"  {cmd:<28}", style="bold cyan")
+        help_text.append(" ")
+        help_text.append(desc, style="dim")
+        help_text.append("\n")
+    if HAS_READLINE:
+        help_text.append("\n")
+        help_text.append(
+            "Dica: Use Tab para autocompletar comandos e nomes de arquivo.",
+            style="dim",
+        )
+        help_text.append("\n")
+    return help_text
+
+
+def _format_history_timestamp(timestamp: str) -> str:
+    """Formata o timestamp ISO de um histórico como dd/mm/aaaa hh:mm."""
+    try:
+        return datetime.fromisoformat(timestamp).strftime("%d/%m/%Y %H:%M")
+    except ValueError:
+        return timestamp
+
+
+def _build_history_list_hint() -> Text:
+    """Monta a dica exibida ao final da lista de históricos."""
+    hint = "Use /carregar <nome_arquivo> para carregar"
+    if HAS_READLINE:
+        hint += " (Tab para autocompletar)"
+    return Text.assemble("\n", (hint + ".", "dim"), "\n")
+
+
+# Textos estáticos montados uma única vez, sem parse de markup a cada exibição
+_BANNER: Text = Text.from_markup(BANNER_MARKUP)
+_HELP: Text = _build_help()
+_HISTORY_LIST_HEADER: Text = Text.assemble(
+    "\n", ("Arquivos de histórico disponíveis:", "bold dim"), "\n"
+)
+_HISTORY_LIST_EMPTY: Text = Text.assemble(
+    "\n", ("Nenhum arquivo de histórico encontrado.", "dim"), "\n"
+)
+_HISTORY_LIST_HINT: Text = _build_history_list_hint()
+
+
+def _raw_control(sequence: str) -> Control:
+    """Cria um Control que emite uma sequência de escape literal."""
+    control = Control()
+    # O Rich não tem ControlType para modos privados DEC nem API pública
+    # para sequências arbitrárias. Um Segment com qualquer código de
+    # controle (aqui BELL, que nunca é interpretado) é escrito literalmente,
+    # sem largura e fora de export_text; esse comportamento não é
+    # documentado, por isso _synchronized_controls o valida.
+    control.segment = Segment(sequence, None, [(ControlType.BELL,)])
+    return control
+
+
+@functools.cache
+def _synchronized_controls() -> tuple[Control, Control] | None:
+    """Controls que abrem e fecham o modo 2026, ou None se o Rich não os suportar."""
+    try:
+        begin = _raw_control(BEGIN_SYNCHRONIZED_UPDATE)
+        end = _raw_control(END_SYNCHRONIZED_UPDATE)
+        supported = all(
+            c.segment.is_control and c.segment.cell_length == 0 for c in (begin, end)
+        )
+    except Exception as e:
+        logger.debug("Saída sincronizada desativada: %s", e)
+        return None
+    if not supported:
+        logger.debug("Saída sincronizada desativada: segmentos de controle não suportados")
+        return None
+    return begin, end
+
+
+def _live_internals(live: "Live") -> tuple[Any, list] | None:
+    """Retorna o lock do Live e a pilha de Lives do console.
+
+    São atributos privados do Rich (``Live._lock`` e
+    ``Console._live_stack``, presentes a partir do 14.0). Se uma versão
+    nova os remover, retorna None e o Live se comporta como o padrão.
+    """
+    lock = getattr(live, "_lock", None)
+    live_stack = getattr(live.console, "_live_stack", None)
+    if lock is None or not isinstance(live_stack, list):
+        logger.debug("Saída sincronizada desativada: versão do Rich incompatível")
+        return None
+    return lock, live_stack
+
+
+@functools.cache
+def _live_class() -> "type[Live]":
+    """Retorna a subclasse de Live com saída sincronizada (importada no primeiro uso)."""
+    from rich.live import Live
+
+    class _SynchronizedLive(Live):
+        """Live que delimita cada redesenho com o modo 2026 do terminal.
+
+        O terminal apresenta o quadro inteiro de uma vez, sem estados
+        intermediários; terminais sem suporte ignoram a sequência.
+
+        Com skip_unchanged=True, refreshes automáticos em que get_renderable
+        devolve o mesmo objeto já desenhado, no mesmo tamanho de terminal,
+        não escrevem nada: sem chunks novos o streaming fica ocioso em vez
+        de redesenhar o quadro inteiro a cada tick.
+
+        Se a versão do Rich não oferecer o que é preciso (ver
+        _live_internals e _synchronized_controls), age como o Live padrão.
+        """
+
+        def __init__(self, *args: Any, skip_unchanged: bool = False, **kwargs: Any) -> None:
+            super().__init__(*args, **kwargs)
+            self._skip_unchanged = skip_unchanged
+            self._drawn: tuple[object, object] | None = None
+            internals = _live_internals(self)
+            controls = _synchronized_controls()
+            self._sync: tuple[Any, list, Control, Control] | None = (
+                internals + controls if internals and controls else None
+            )
+
+        def _unchanged(self, live_stack: list) -> bool:
+            """Indica se o quadro atual já está na tela (requer _lock)."""
+            if not (self._skip_unchanged and self.is_started):
+                return False
+            # Com Lives aninhados o quadro combina todos; não há como comparar.
+            if len(live_stack) > 1:
+                return False
+            renderable, size = self.get_renderable(), self.console.size
+            drawn = self._drawn
+            self._drawn = (renderable, size)
+            return drawn is not None and drawn[0] is renderable and drawn[1] == size
+
+        def refresh(self) -> None:
+            if self._sync is None:
+                super().refresh()
+                return
+            lock, live_stack, begin, end = self._sync
+            console = self.console
+            with lock:
+                if self._unchanged(live_stack):
+                    return
+                if (
+                    not console.is_terminal
+                    or console.is_dumb_terminal
+                    or console.legacy_windows
+                    or console.is_jupyter
+                ):
+                    super().refresh()
+                    return
+
+                # As sequências entram no mesmo buffer do quadro, na ordem certa
+                # mesmo quando o Live já está dentro de um buffer (ex.: stop()).
+                with console:
+                    console.control(begin)
+                    super().refresh()
+                    console.control(end)
+
+    return _SynchronizedLive
+
+
+class _SpinnerLine:
+    """Linha do spinner, construída uma vez e reutilizada em todos os frames.
+
+    A cada frame apenas `frame` é trocado (índice do caractere animado e
+    corpo em cache); os segmentos dos caracteres são pré-construídos.
+    """
+
+    _GAP = Segment(" ")
+
+    def __init__(self, chars: str) -> None:
+        self._chars = chars
+        style = Style(color="cyan")
+        self._glyphs = [Segment(char, style) for char in chars]
+        self.frame: tuple[int, Text] = (0, Text(""))
+
+    def __str__(self) -> str:
+        char_idx, body = self.frame
+        return f"{self._chars[char_idx]} {body.plain}"
+
+    def __rich_console__(self, console: Console, options: ConsoleOptions) -> RenderResult:
+        char_idx, body = self.frame
+        yield self._glyphs[char_idx]
+        yield self._GAP
+        yield from console.render(body, options.update_width(max(1, options.max_width - 2)))
+        yield Segment.line()
+
+
+@dataclass(frozen=True)
+class SpinnerState:
+    """Snapshot imutável do estado de uma execução do spinner."""
+
+    word_index: int = 0
+    start_ns: int = 0
+
+
 class RotatingSpinner:
     """Spinner com palavras rotativas usando Rich Live.
 
+    A animação é conduzida pelo auto-refresh do próprio Live, que chama
+    _get_renderable a cada frame; o quadro é derivado do tempo decorrido,
+    sem thread de animação própria.
+
     Thread-safety: Usa _state_lock para proteger transições start/stop.
-    O padrão é: capturar referências dentro do lock, fazer cleanup fora.
+    O estado de cada execução fica em um SpinnerState imutável, trocado
+    por atribuição única; o contador de tokens é um int simples. Ambos
+    são lidos sem lock pelo refresh do Live.
     """
 
-    def __init__(self, console: Console) -> None:
-        self.console: Console = console
+    def __init__(self, console: Console | None = None) -> None:
+        self.console: Console = console if console is not None else _CONSOLE
         self.live: Live | None = None
         self.running: bool = False
-        self.thread: threading.Thread | None = None
         self.spinner_chars: str = "⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏"
-        self.char_index: int = 0
-        self.word_index: int = 0
         self.word_change_interval: float = WORD_CHANGE_INTERVAL
-        self.last_word_change: float = 0
-        self.start_time: float = 0
+        self._state: SpinnerState = SpinnerState()
         self._token_count: int = 0
-        self._lock: threading.Lock = threading.Lock()
         self._state_lock: threading.Lock = threading.Lock()
-        self._stop_event: threading.Event = threading.Event()
+        self._body: tuple[tuple[int, int, int], Text] | None = None
+        self._line: _SpinnerLine = _SpinnerLine(self.spinner_chars)
 
     def __repr__(self) -> str:
         return f"RotatingSpinner(running={self.running})"
 
-    def _get_renderable(self) -> Text:
-        with self._lock:
-            char_idx = self.char_index
-            word_idx = self.word_index
-            start = self.start_time
-            tokens = self._token_count
-
-        char = self.spinner_chars[char_idx % len(self.spinner_chars)]
-        word = THINKING_WORDS[word_idx % len(THINKING_WORDS)]
-        elapsed = int(time.time() - start) if start else 0
-
-        parts: list[tuple[str, str] | str] = [
-            (char, "cyan"),
-            " ",
+    def _get_renderable(self) -> _SpinnerLine:
+        state = self._state
+        tokens = self._token_count
+
+        start = state.start_ns
+        elapsed_ns = time.monotonic_ns() - start if start else 0
+        char_idx = elapsed_ns * SPINNER_REFRESH_RATE // _NS_PER_SECOND % len(self.spinner_chars)
+        word_idx = (
+            state.word_index + elapsed_ns // int(self.word_change_interval * _NS_PER_SECOND)
+        ) % len(THINKING_WORDS)
+
+        # O corpo (palavra, segundos, tokens) muda no máximo uma vez por
+        # segundo ou por atualização de tokens; só ele exige o assemble completo.
+        body_key = (elapsed_ns // _NS_PER_SECOND, tokens, word_idx)
+        body = self._body
+        if body is None or body[0] != body_key:
+            body = (body_key, self._build_body(THINKING_WORDS[word_idx], body_key[0], tokens))
+            self._body = body
+
+        self._line.frame = (char_idx, body[1])
+        return self._line
+
+    def _build_body(self, word: str, elapsed: int, tokens: int) -> Text:
+        """Monta o texto do spinner após o caractere animado."""
+        parts: list[tuple[str, str]] = [
             (f"{word}…", "dim"),
             (" (Ctrl+C para cancelar", "dim"),
             (" · ", "dim"),
@@ -158,18 +432,18 @@ class RotatingSpinner:
                 (" tokens", "dim"),
             ])
         parts.append((")", "dim"))
-        return Text.assemble(*parts)
+        return Text.assemble(*parts, end="")
 
     def update_tokens(self, count: int) -> None:
         """Atualiza o contador de tokens (thread-safe)."""
-        with self._lock:
-            self._token_count = count
+        # Atribuição única de atributo: atômica no CPython, inclusive no build
+        # free-threaded, e o leitor tolera um valor de um frame atrás.
+        self._token_count = count
 
     @property
     def token_count(self) -> int:
         """Retorna o contador de tokens (thread-safe)."""
-        with self._lock:
-            return self._token_count
+        return self._token_count
 
     def _format_tokens(self, count: int) -> str:
         """Formata contagem de tokens para exibição legível."""
@@ -179,50 +453,29 @@ class RotatingSpinner:
             return f"{count / 1_000:.1f}k"
         return str(count)
 
-    def _animate(self) -> None:
-        last_word_change = time.time()
-        while not self._stop_event.wait(timeout=ANIMATION_FRAME_INTERVAL):
-            with self._lock:
-                live = self.live
-                if live is None or not self.running:
-                    break
-
-                if time.time() - last_word_change >= self.word_change_interval:
-                    self.word_index = (self.word_index + 1) % len(THINKING_WORDS)
-                    last_word_change = time.time()
-
-                self.char_index = (self.char_index + 1) % len(self.spinner_chars)
-
-            if live is not None:
-                try:
-                    live.update(self._get_renderable())
-                except Exception as e:
-                    logger.debug("Animação do spinner interrompida: %s", e)
-                    break
-
     def start(self) -> None:
         """Inicia o spinner (thread-safe)."""
         with self._state_lock:
             if self.running:
                 return
             self.running = True
-            self._stop_event.clear()
-
-            with self._lock:
-                self.start_time = time.time()
-                self._token_count = 0
-                self.char_index = 0
-                self.word_index = random.randint(0, len(THINKING_WORDS) - 1)
+            self._token_count = 0
+            self._state = SpinnerState(
+                word_index=random.randint(0, len(THINKING_WORDS) - 1),
+                start_ns=time.monotonic_ns(),
+            )
 
-            self.live = Live(
-                self._get_renderable(),
+            self.live = _live_class()(
                 console=self.console,
                 transient=True,
-                refresh_per_second=SPINNER_REFRESH_RATE
+                auto_refresh=True,
+                refresh_per_second=SPINNER_REFRESH_RATE,
+                get_renderable=self._get_renderable,
+                # Uma única linha: nada a medir para reticências de overflow.
+                # O próprio Live já oculta o cursor enquanto está ativo.
+                vertical_overflow="crop",
             )
             self.live.start()
-            self.thread = threading.Thread(target=self._animate, daemon=True)
-            self.thread.start()
             logger.debug("Spinner iniciado")
 
     def stop(self) -> None:
@@ -231,20 +484,10 @@ class RotatingSpinner:
             if not self.running:
                 return
 
-            self._stop_event.set()
             self.running = False
-
-            with self._lock:
-                thread = self.thread
-                live = self.live
-                start_time = self.start_time
-                self.thread = None
-                self.live = None
-
-        if thread and thread.is_alive():
-            thread.join(timeout=THREAD_JOIN_TIMEOUT)
-            if thread.is_alive():
-                logger.warning("Thread do spinner não parou dentro do timeout")
+            live = self.live
+            start_ns = self._state.start_ns
+            self.live = None
 
         if live:
             try:
@@ -252,67 +495,221 @@ class RotatingSpinner:
             except Exception as e:
                 logger.debug("Erro ao parar Live do spinner: %s", e)
 
-        elapsed = time.time() - start_time if start_time else 0
+        elapsed = (time.monotonic_ns() - start_ns) / _NS_PER_SECOND if start_ns else 0
         logger.debug("Spinner parado após %.1fs", elapsed)
 
 
+# Definição de link por referência ("[id]: url"); pode afetar blocos anteriores
+_REFERENCE_DEFINITION_PATTERN = re.compile(r" {0,3}\[[^\]]+\]:\s*\S")
+
+
+@functools.cache
+def _markdown_prototype() -> "tuple[Markdown, MarkdownIt]":
+    """Cria uma vez o Markdown modelo e o parser markdown-it compartilhado.
+
+    Markdown.__init__ monta um MarkdownIt novo a cada chamada, o que custa
+    mais que o próprio parse de trechos curtos durante o streaming.
+    """
+    from markdown_it import MarkdownIt
+    from rich.markdown import Markdown
+
+    parser = MarkdownIt().enable("strikethrough").enable("table")
+    return Markdown(""), parser
+
+
+def _markdown(markup: str) -> "Markdown":
+    """Cria um Markdown com as opções padrão usando o parser compartilhado."""
+    prototype, parser = _markdown_prototype()
+    markdown = copy.copy(prototype)
+    markdown.markup = markup
+    markdown.parsed = parser.parse(markup)
+    return markdown
+
+
+class _MarkdownBlock:
+    """Bloco Markdown exibido sem linhas em branco iniciais.
+
+    Blocos são separados explicitamente no Group de streaming, então as
+    linhas vazias que o Rich emite antes de listas e citações são removidas
+    para não duplicar o espaçamento. As linhas renderizadas ficam em cache
+    por largura, já que blocos completos não mudam mais.
+    """
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self._rendered: tuple[int, list[list[Segment]]] | None = None
+
+    def __rich_console__(self, console: Console, options: ConsoleOptions) -> RenderResult:
+        rendered = self._rendered
+        if rendered is None or rendered[0] != options.max_width:
+            lines = console.render_lines(_markdown(self.text), options, pad=False)
+            start = 0
+            while start < len(lines) and Segment.get_line_length(lines[start]) == 0:
+                start += 1
+            rendered = (options.max_width, lines[start:])
+            self._rendered = rendered
+        new_line = Segment.line()
+        for line in rendered[1]:
+            yield from line
+            yield new_line
+
+
+# Caracteres que podem iniciar sintaxe Markdown em qualquer ponto do texto
+# (quebras de linha cobrem listas, títulos setext e blocos)
+_MARKDOWN_CHAR_PATTERN = re.compile(r"[\n#*_`\[<>&\\|~]")
+# Início de texto que o Markdown trataria de forma diferente de texto puro
+_MARKDOWN_START_PATTERN = re.compile(r"\s|[-+>=\d]")
+
+# Espaçador entre blocos no Group de streaming (nunca é modificado)
+_BLOCK_SPACER = Text("")
+
+
 class StreamingTextDisplay:
     """Exibição de texto em streaming com buffer thread-safe.
 
+    O Live consulta _get_renderable a cada refresh (STREAMING_REFRESH_RATE),
+    então add_chunk apenas acumula texto e marca o frame como sujo; o
+    Markdown é re-renderizado no máximo uma vez por frame, independente da
+    taxa de chunks, e frames sem chunks novos reutilizam o anterior.
+
+    Durante o streaming, blocos já completos (separados por linha em
+    branco fora de blocos de código) são renderizados uma única vez e
+    apenas o bloco final, ainda em andamento, é re-parseado a cada frame.
+    O tail é varrido de forma incremental: apenas linhas novas são lidas,
+    e o estado de bloco de código aberto é mantido entre chunks. Se surgir
+    uma definição de link por referência, que pode alterar blocos
+    anteriores, a divisão é desfeita e o texto passa a ser renderizado
+    inteiro. O frame final usa o texto completo para preservar a
+    formatação exata do Markdown.
+
+    Enquanto nenhum chunk trouxer caracteres de sintaxe Markdown (ver
+    _MARKDOWN_CHAR_PATTERN), o tail é exibido como Text simples, sem
+    passar pelo parser.
+
     Thread-safety: Usa _state_lock para proteger transições start/stop,
     e _lock para proteger acesso ao buffer. O padrão é: capturar
     referências dentro do lock, fazer operações de UI fora.
     """
 
-    def __init__(self, console: Console) -> None:
-        self.console: Console = console
+    def __init__(self, console: Console | None = None) -> None:
+        self.console: Console = console if console is not None else _CONSOLE
         self.live: Live | None = None
         self.running: bool = False
-        self._buffer: str = ""
+        self._chunks: list[str] = []
+        self._joined: str | None = None
+        self._size: int = 0
+        self._blocks: list[_MarkdownBlock] = []
+        self._tail: str = ""
+        self._scan_pos: int = 0
+        self._in_fence: bool = False
+        self._split_blocks: bool = True
+        self._has_markdown: bool = False
+        self._frame: Group | None = None
+        self._dirty: bool = False
         self._lock: threading.Lock = threading.Lock()
         self._state_lock: threading.Lock = threading.Lock()
         self._truncated: bool = False
 
     def __repr__(self) -> str:
         with self._lock:
-            buffer_size = len(self._buffer)
+            buffer_size = self._size
         return f"StreamingTextDisplay(running={self.running}, buffer_size={buffer_size})"
 
-    def _get_renderable(self) -> Markdown | Text:
+    def _get_renderable(self) -> "Group | Markdown | Text":
         """Retorna o texto atual como Markdown."""
         with self._lock:
-            current_text = self._buffer
+            if self.running:
+                if self._frame is None or self._dirty:
+                    self._frame = self._build_frame()
+                    self._dirty = False
+                return self._frame
+            current_text = self._joined_text()
 
         if not current_text:
             return Text("")
-
-        return Markdown(current_text)
+        return _markdown(current_text)
+
+    def _build_frame(self) -> Group:
+        """Monta o Group com os blocos completos e o tail (requer _lock)."""
+        parts: list[_MarkdownBlock | Text] = []
+        for block in self._blocks:
+            parts.extend((block, _BLOCK_SPACER))
+        if self._tail:
+            parts.append(_MarkdownBlock(self._tail) if self._has_markdown else Text(self._tail))
+        elif parts:
+            parts.pop()
+        return Group(*parts)
 
     def add_chunk(self, chunk: str) -> None:
         """Adiciona chunk ao buffer (thread-safe)."""
         with self._lock:
-            if len(self._buffer) + len(chunk) > MAX_BUFFER_SIZE:
+            if self._size + len(chunk) > MAX_BUFFER_SIZE:
                 if not self._truncated:
                     logger.warning("Limite do buffer atingido, resposta truncada")
                     self._truncated = True
                 return
-            self._buffer += chunk
-            if not self.running:
-                return
-            live = self.live
-            current_text = self._buffer
-
-        if live is not None:
-            renderable = Markdown(current_text) if current_text else Text("")
-            try:
-                live.update(renderable)
-            except Exception as e:
-                logger.debug("Falha ao atualizar display: %s", e)
+            self._chunks.append(chunk)
+            self._joined = None
+            self._size += len(chunk)
+            self._tail += chunk
+            self._dirty = True
+            if not self._has_markdown:
+                self._has_markdown = bool(
+                    _MARKDOWN_CHAR_PATTERN.search(chunk)
+                    or _MARKDOWN_START_PATTERN.match(self._tail)
+                )
+            self._split_stable_prefix()
+
+    def _split_stable_prefix(self) -> None:
+        """Move os blocos completos do início do tail para _blocks (requer _lock).
+
+        Apenas as linhas completas ainda não lidas são varridas; um bloco
+        termina em uma linha em branco fora de blocos de código cercados
+        (``` ou ~~~).
+        """
+        if not self._split_blocks:
+            return
+        tail = self._tail
+        pos = self._scan_pos
+        stable = 0
+        while (end := tail.find("\n", pos)) != -1:
+            line = tail[pos:end]
+            stripped = line.strip()
+            if stripped.startswith(("```", "~~~")):
+                self._in_fence = not self._in_fence
+            elif not self._in_fence:
+                if not stripped:
+                    stable = end + 1
+                elif _REFERENCE_DEFINITION_PATTERN.match(line):
+                    self._merge_blocks()
+                    return
+            pos = end + 1
+        self._scan_pos = pos
+
+        if stable:
+            self._blocks.append(_MarkdownBlock(tail[:stable]))
+            self._tail = tail[stable:]
+            self._scan_pos -= stable
+
+    def _merge_blocks(self) -> None:
+        """Desfaz a divisão em blocos e passa a renderizar o texto inteiro (requer _lock)."""
+        merged = "".join(block.text for block in self._blocks)
+        self._split_blocks = False
+        self._tail = merged + self._tail
+        self._blocks = []
+
+    def _joined_text(self) -> str:
+        """Retorna os chunks concatenados (requer _lock)."""
+        if self._joined is None:
+            # Compacta a lista para que o próximo join parta deste resultado
+            self._joined = "".join(self._chunks)
+            self._chunks = [self._joined]
+        return self._joined
 
     def get_full_text(self) -> str:
         """Retorna texto completo acumulado."""
         with self._lock:
-            return self._buffer
+            return self._joined_text()
 
     def start(self) -> None:
         """Inicia exibição em streaming (thread-safe)."""
@@ -322,15 +719,27 @@ class StreamingTextDisplay:
 
             self.running = True
             with self._lock:
-                self._buffer = ""
+                self._chunks = []
+                self._joined = None
+                self._size = 0
+                self._blocks = []
+                self._tail = ""
+                self._scan_pos = 0
+                self._in_fence = False
+                self._split_blocks = True
+                self._has_markdown = False
+                self._frame = None
+                self._dirty = False
                 self._truncated = False
 
             self.console.print()
-            self.live = Live(
-                self._get_renderable(),
+            self.live = _live_class()(
                 console=self.console,
+                auto_refresh=True,
                 refresh_per_second=STREAMING_REFRESH_RATE,
+                get_renderable=self._get_renderable,
                 vertical_overflow="visible",
+                skip_unchanged=True,
             )
             self.live.start()
 
@@ -342,16 +751,13 @@ class StreamingTextDisplay:
 
             self.running = False
             with self._lock:
-                current_text = self._buffer
-                total_chars = len(self._buffer)
+                total_chars = self._size
                 was_truncated = self._truncated
                 live = self.live
                 self.live = None
 
         if live:
-            renderable = Markdown(current_text) if current_text else Text("")
             try:
-                live.update(renderable)
                 live.stop()
             except Exception as e:
                 logger.debug("Erro ao parar Live do streaming: %s", e)
@@ -370,8 +776,8 @@ class StreamingTextDisplay:
 class Display:
     """Gerencia a exibição formatada no terminal."""
 
-    def __init__(self) -> None:
-        self.console: Console = Console()
+    def __init__(self, console: Console | None = None) -> None:
+        self.console: Console = console if console is not None else _CONSOLE
         self.spinner: RotatingSpinner = RotatingSpinner(self.console)
         self.streaming: StreamingTextDisplay = StreamingTextDisplay(self.console)
         self.completer: ChatCompleter = ChatCompleter()
@@ -406,46 +812,17 @@ class Display:
 
     def show_banner(self) -> None:
         """Exibe o banner de boas-vindas."""
-        logo = """[bold cyan]
-    ████████╗██╗ ██████╗    ██████╗  ██████╗ ████████╗    ██╗  ██╗██████╗
-    ╚══██╔══╝██║██╔════╝    ██╔══██╗██╔═══██╗╚══██╔══╝    ██║  ██║╚════██╗
-       ██║   ██║██║         ██████╔╝██║   ██║   ██║       ███████║ █████╔╝
-       ██║   ██║██║         ██╔══██╗██║   ██║   ██║       ╚════██║ ╚═══██╗
-       ██║   ██║╚██████╗    ██████╔╝╚██████╔╝   ██║            ██║██████╔╝
-       ╚═╝   ╚═╝ ╚═════╝    ╚═════╝  ╚═════╝    ╚═╝            ╚═╝╚═════╝[/bold cyan]
-
-    [bold magenta]>[/bold magenta] [bold white]Chatbot Conversacional com IA Generativa[/bold white]
-    [bold yellow]>[/bold yellow] [italic]Powered by Vertex[/italic]
-"""
-        self.console.print(logo)
+        self.console.print(_BANNER)
         self.console.print()
 
     def show_help(self) -> None:
         """Exibe os comandos disponíveis."""
-        self.console.print()
-        self.console.print("[bold dim]Comandos disponíveis:[/bold dim]")
-        self.console.print()
-        commands = [
-            ("sair, exit, quit", "Encerra o chatbot"),
-            ("/limpar, /clear", "Limpa o histórico da conversa"),
-            ("/salvar, /save \\[nome]", "Salva o histórico em arquivo"),
-            ("/listar, /list", "Lista históricos salvos"),
-            ("/carregar, /load <arquivo>", "Carrega histórico de arquivo"),
-            ("/ajuda, /help", "Mostra esta mensagem"),
-            ("/modelo, /model \\[nome]", "Mostra ou altera o modelo atual"),
-            ("/streaming, /stream", "Alterna modo streaming on/off"),
-        ]
-        for cmd, desc in commands:
-            self.console.print(f"  [bold cyan]{cmd:<28}[/bold cyan] [dim]{desc}[/dim]")
-        self.console.print()
-        if HAS_READLINE:
-            self.console.print("[dim]Dica: Use Tab para autocompletar comandos e nomes de arquivo.[/dim]")
-            self.console.print()
+        self.console.print(_HELP)
 
     def show_bot_message(self, message: str) -> None:
         """Exibe uma resposta do bot com suporte a Markdown."""
         self.console.print()
-        md = Markdown(message)
+        md = _markdown(message)
         self.console.print(md)
         self.console.print()
 
@@ -507,35 +884,31 @@ class Display:
 
     def show_history_list(self, files: list[tuple[str, str, str]]) -> None:
         """Exibe lista de arquivos de histórico disponíveis."""
-        self.console.print()
         if not files:
-            self.console.print("[dim]Nenhum arquivo de histórico encontrado.[/dim]")
-            self.console.print()
+            self.console.print(_HISTORY_LIST_EMPTY)
             self.completer.set_history_files([])
             return
 
         self.completer.set_history_files([f[0] for f in files])
 
-        self.console.print("[bold dim]Arquivos de histórico disponíveis:[/bold dim]")
-        self.console.print()
+        from rich.padding import Padding
+        from rich.table import Table
+
+        table = Table.grid(padding=(0, 1))
+        table.add_column(style="cyan", min_width=30)
+        table.add_column(style="dim")
+        # Células como Text: nomes de arquivo não passam pelo parser de markup
         for filename, timestamp, model in files:
-            try:
-                dt = datetime.fromisoformat(timestamp)
-                formatted_time = dt.strftime("%d/%m/%Y %H:%M")
-            except ValueError:
-                formatted_time = timestamp
-            self.console.print(
-                f"  [cyan]{filename:<30}[/cyan] "
-                f"[dim]{formatted_time}[/dim] "
-                f"[dim]({model})[/dim]"
+            table.add_row(
+                Text(filename), Text(f"{_format_history_timestamp(timestamp)} ({model})")
             )
-        self.console.print()
-        hint = "[dim]Use /carregar <nome_arquivo> para carregar"
-        if HAS_READLINE:
-            hint += " (Tab para autocompletar)"
-        hint += ".[/dim]"
-        self.console.print(hint)
-        self.console.print()
+        self.console.print(
+            Group(
+                _HISTORY_LIST_HEADER,
+                Padding(table, (0, 0, 0, 2), expand=False),
+                _HISTORY_LIST_HINT,
+            )
+        )
 
     def prompt_input(self) -> str:
         """Solicita entrada do usuário."""
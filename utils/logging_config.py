@@ -1,41 +1,189 @@
 """Configuração de logging estruturado para o chatbot."""
 
+import atexit
+import copy
+import functools
 import json
 import logging
 import os
+import queue
 import sys
-from datetime import datetime, timezone
+import threading
+import time
+from json.encoder import encode_basestring as _encode_json_str
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from typing import Any
 
-__all__ = ["StructuredFormatter", "ConsoleFormatter", "setup_logging"]
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+__all__ = [
+    "StructuredFormatter",
+    "ConsoleFormatter",
+    "BufferedFileHandler",
+    "BytesJSONFileHandler",
+    "RecordQueueHandler",
+    "log_structured",
+    "setup_logging",
+]
+
+logger = logging.getLogger(__name__)
+
+LOG_FILE_BUFFER_SIZE = 64 * 1024  # bytes - buffer do arquivo de log
+LOG_FLUSH_INTERVAL = 0.1  # segundos - atraso máximo até o registro chegar ao disco
+
+# Inclui os aliases aceitos pelo módulo logging (WARN, FATAL, NOTSET)
+LEVEL_MAP = {
+    "NOTSET": logging.NOTSET,
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARN": logging.WARNING,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+    "FATAL": logging.CRITICAL,
+    "CRITICAL": logging.CRITICAL,
+}
+
+
+def _record_message(record: logging.LogRecord) -> str:
+    """Retorna a mensagem do registro, sem interpolação quando não há args."""
+    msg = record.msg
+    if not record.args and type(msg) is str:
+        return msg
+    return record.getMessage()
+
+
+def _stdlib_dumps(data: dict[str, Any]) -> str:
+    """Serializa sem orjson, escrevendo diretamente os campos simples.
+
+    As chaves são os nomes fixos do StructuredFormatter (sem escape);
+    strings e ints são emitidos sem passar pelo encoder genérico, que só
+    é usado para os demais valores (ex.: o dicionário de "data").
+    """
+    parts = []
+    for key, value in data.items():
+        value_type = type(value)
+        if value_type is str:
+            encoded = _encode_json_str(value)
+        elif value_type is int:
+            encoded = str(value)
+        else:
+            encoded = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        parts.append(f'"{key}":{encoded}')
+    return "{" + ",".join(parts) + "}"
+
+
+def _orjson_dumps(data: dict[str, Any]) -> str:
+    """Serializa com orjson, recorrendo à stdlib para tipos não suportados."""
+    try:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    except TypeError:
+        return _stdlib_dumps(data)
+
+
+def _stdlib_dumps_line(data: dict[str, Any]) -> bytes:
+    """Serializa como uma linha UTF-8 terminada em \\n, sem orjson."""
+    return (_stdlib_dumps(data) + "\n").encode("utf-8")
+
+
+def _orjson_dumps_line(data: dict[str, Any]) -> bytes:
+    """Serializa com orjson direto em bytes, já com a quebra de linha."""
+    try:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    except TypeError:
+        return _stdlib_dumps_line(data)
 
 
 class StructuredFormatter(logging.Formatter):
-    """Formatter que produz logs em formato JSON estruturado."""
+    """Formatter que produz logs em formato JSON estruturado.
+
+    O timestamp vem de record.created; a parte até os segundos é
+    formatada uma vez por segundo e reaproveitada. A serialização usa
+    orjson quando disponível.
+    """
+
+    # Escolhidos uma vez na importação, sem testar orjson a cada registro
+    _dumps = staticmethod(_orjson_dumps if orjson is not None else _stdlib_dumps)
+    _dumps_line = staticmethod(_orjson_dumps_line if orjson is not None else _stdlib_dumps_line)
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._second_prefix: tuple[int, str] = (-1, "")
+
+    def _timestamp(self, created: float) -> str:
+        """Formata record.created em ISO 8601 (UTC com sufixo Z, microssegundos)."""
+        second = int(created)
+        cached_second, prefix = self._second_prefix
+        if second != cached_second:
+            tm = time.gmtime(second)
+            prefix = "%04d-%02d-%02dT%02d:%02d:%02d" % (
+                tm.tm_year, tm.tm_mon, tm.tm_mday, tm.tm_hour, tm.tm_min, tm.tm_sec
+            )
+            self._second_prefix = (second, prefix)
+        return "%s.%06dZ" % (prefix, (created - second) * 1_000_000)
 
     def format(self, record: logging.LogRecord) -> str:
+        return self._dumps(self.format_dict(record))
+
+    def format_line(self, record: logging.LogRecord) -> bytes:
+        """Formata o registro como uma linha JSON em UTF-8, terminada em \\n."""
+        return self._dumps_line(self.format_dict(record))
+
+    def format_dict(self, record: logging.LogRecord) -> dict[str, Any]:
+        """Monta o dicionário do registro, antes da serialização."""
         log_data: dict[str, Any] = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": self._timestamp(record.created),
             "level": record.levelname,
             "logger": record.name,
-            "message": record.getMessage(),
+            "message": _record_message(record),
             "module": record.module,
             "function": record.funcName,
             "line": record.lineno,
         }
 
-        if record.exc_info:
-            log_data["exception"] = self.formatException(record.exc_info)
+        exc_info = record.exc_info
+        if exc_info:
+            # Mesmo cache do logging.Formatter: o traceback é formatado uma
+            # única vez por registro, mesmo com vários handlers
+            if not record.exc_text:
+                record.exc_text = self.formatException(exc_info)
+            log_data["exception"] = record.exc_text
+
+        extra_data = record.__dict__.get("extra_data")
+        if extra_data is not None:
+            log_data["data"] = extra_data
+
+        return log_data
 
-        if hasattr(record, "extra_data"):
-            log_data["data"] = record.extra_data
 
-        return json.dumps(log_data, ensure_ascii=False)
+def log_structured(
+    logger: logging.Logger, level: int, msg: str, /, *args: Any, **data: Any
+) -> None:
+    """Registra uma mensagem com dados estruturados (campo "data" no JSON).
+
+    Forma recomendada de anexar dados extras: se o nível estiver desativado
+    para o logger, retorna antes de montar o dicionário de extra.
+
+    Args:
+        logger: Logger de destino.
+        level: Nível numérico (ex.: logging.INFO).
+        msg: Mensagem, com argumentos no estilo %.
+        *args: Argumentos da mensagem.
+        **data: Dados extras serializados pelo StructuredFormatter.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    logger.log(level, msg, *args, extra={"extra_data": data} if data else None, stacklevel=2)
 
 
 class ConsoleFormatter(logging.Formatter):
-    """Formatter colorido para console (desenvolvimento)."""
+    """Formatter colorido para console (desenvolvimento).
+
+    O horário vem de record.created e é formatado uma vez por segundo.
+    """
 
     COLORS = {
         "DEBUG": "\033[36m",
@@ -46,14 +194,194 @@ class ConsoleFormatter(logging.Formatter):
     }
     RESET = "\033[0m"
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._last_second: tuple[int, str] = (-1, "")
+        # Partes fixas da linha por nível, antes e depois do horário
+        self._level_affixes: dict[int, tuple[str, str]] = {
+            logging.getLevelName(name): (f"{color}[", f"] {name:<8}{self.RESET} ")
+            for name, color in self.COLORS.items()
+        }
+
     def format(self, record: logging.LogRecord) -> str:
-        color = self.COLORS.get(record.levelname, self.RESET)
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        return (
-            f"{color}[{timestamp}] {record.levelname:<8}{self.RESET} "
-            f"{record.name}: {record.getMessage()}"
+        affixes = self._level_affixes.get(record.levelno)
+        if affixes is None:
+            affixes = (f"{self.RESET}[", f"] {record.levelname:<8}{self.RESET} ")
+        second = int(record.created)
+        cached_second, timestamp = self._last_second
+        if second != cached_second:
+            timestamp = time.strftime("%H:%M:%S", time.localtime(second))
+            self._last_second = (second, timestamp)
+        return affixes[0] + timestamp + affixes[1] + record.name + ": " + _record_message(record)
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """FileHandler que acumula registros no buffer do arquivo.
+
+    O arquivo só é aberto no primeiro registro (delay=True); setup_logging
+    o abre antes para validar o caminho. Ao contrário do FileHandler
+    padrão, não é descarregado a cada emit: uma thread
+    daemon descarrega o buffer no máximo flush_interval segundos depois
+    do primeiro registro pendente. Registros ERROR ou acima são gravados
+    imediatamente, e flush()/close() (chamados por logging.shutdown na
+    saída) gravam o restante.
+    """
+
+    def __init__(
+        self,
+        filename: str | Path,
+        encoding: str | None = "utf-8",
+        buffer_size: int = LOG_FILE_BUFFER_SIZE,
+        mode: str = "a",
+        flush_interval: float = LOG_FLUSH_INTERVAL,
+    ) -> None:
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self._pending = threading.Event()
+        self._stop_flusher: threading.Event | None = None
+        super().__init__(filename, mode=mode, encoding=encoding, delay=True)
+
+    def _open(self):  # type: ignore[override]
+        return open(
+            self.baseFilename,
+            self.mode,
+            buffering=self.buffer_size,
+            encoding=self.encoding,
+            errors=self.errors,
         )
 
+    def _start_flusher(self) -> None:
+        """Inicia a thread que descarrega o buffer periodicamente (requer lock)."""
+        stop = threading.Event()
+        self._stop_flusher = stop
+        self._pending.clear()
+        threading.Thread(
+            target=self._flush_loop, args=(stop,), name="log-file-flusher", daemon=True
+        ).start()
+
+    def _flush_loop(self, stop: threading.Event) -> None:
+        """Aguarda registros pendentes e os descarrega após flush_interval."""
+        while True:
+            self._pending.wait()
+            if stop.wait(self.flush_interval):
+                return
+            self._pending.clear()
+            self.flush()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            if self._stop_flusher is None:
+                self._start_flusher()
+            self.stream.write(self._serialize(record))
+            if record.levelno >= logging.ERROR:
+                self.stream.flush()
+            elif not self._pending.is_set():
+                self._pending.set()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def close(self) -> None:
+        with self.lock:
+            stop = self._stop_flusher
+            if stop is not None:
+                self._stop_flusher = None
+                stop.set()
+                self._pending.set()
+            super().close()
+
+    def _serialize(self, record: logging.LogRecord) -> str:
+        """Retorna o conteúdo escrito no arquivo para o registro."""
+        return self.format(record) + self.terminator
+
+
+class BytesJSONFileHandler(BufferedFileHandler):
+    """BufferedFileHandler que grava linhas JSON como bytes.
+
+    O arquivo é aberto em modo binário e, com um StructuredFormatter, o
+    registro vai do dicionário para bytes (orjson) sem passar por str nem
+    por uma segunda codificação UTF-8. Outros formatters são codificados
+    normalmente.
+    """
+
+    def __init__(
+        self,
+        filename: str | Path,
+        buffer_size: int = LOG_FILE_BUFFER_SIZE,
+        flush_interval: float = LOG_FLUSH_INTERVAL,
+    ) -> None:
+        super().__init__(
+            filename,
+            encoding=None,
+            buffer_size=buffer_size,
+            mode="ab",
+            flush_interval=flush_interval,
+        )
+
+    def _open(self):  # type: ignore[override]
+        return open(self.baseFilename, self.mode, buffering=self.buffer_size)
+
+    def _serialize(self, record: logging.LogRecord) -> bytes:  # type: ignore[override]
+        formatter = self.formatter
+        if isinstance(formatter, StructuredFormatter):
+            return formatter.format_line(record)
+        return (self.format(record) + self.terminator).encode("utf-8")
+
+
+class RecordQueueHandler(QueueHandler):
+    """QueueHandler que preserva exc_info e extra_data dos registros.
+
+    O QueueHandler padrão (3.11) formata o registro na thread que loga e
+    descarta exc_info, embutindo o traceback na mensagem; aqui apenas a
+    mensagem é resolvida (para não depender de args mutáveis) e o
+    StructuredFormatter do arquivo, na thread do listener, ainda gera o
+    campo "exception".
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+_queue_listener: QueueListener | None = None
+# Última configuração aplicada e os handlers instalados por ela
+_active_config: tuple[tuple[int, str, str, bool], list[logging.Handler]] | None = None
+# Diretórios de log já criados nesta execução (evita mkdir a cada setup_logging)
+_dirs_made: set[str] = set()
+
+
+def _stop_queue_listener() -> None:
+    """Para o listener do arquivo de log, gravando e fechando seus handlers."""
+    global _queue_listener
+    listener = _queue_listener
+    if listener is None:
+        return
+    _queue_listener = None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+# Registrado depois do logging.shutdown da stdlib, portanto executa antes dele
+atexit.register(_stop_queue_listener)
+
+
+@functools.lru_cache(maxsize=32)
+def _resolve_config(log_level: str, log_format: str) -> tuple[str, str, int]:
+    """Normaliza nível e formato, já resolvidos contra o ambiente.
+
+    Returns:
+        Tupla (nome do nível, formato, nível numérico); níveis
+        desconhecidos resultam em WARNING.
+    """
+    log_level = log_level.upper()
+    return log_level, log_format.lower(), LEVEL_MAP.get(log_level, logging.WARNING)
+
 
 def setup_logging(
     log_level: str | None = None,
@@ -72,50 +400,91 @@ def setup_logging(
     Note:
         Parâmetros explícitos têm precedência sobre variáveis de ambiente.
         Isso evita mutação de os.environ e é thread-safe.
+
+        O arquivo de log é escrito por uma thread própria (QueueListener);
+        o root logger recebe apenas um RecordQueueHandler.
+
+        Chamadas repetidas com a mesma configuração efetiva, com os
+        handlers instalados ainda no root logger, não fazem nada.
     """
-    log_level_requested = log_level is not None or os.getenv("LOG_LEVEL") is not None
+    global _queue_listener, _active_config
 
-    log_level = (log_level or os.getenv("LOG_LEVEL", "WARNING")).upper()
-    log_format = (log_format or os.getenv("LOG_FORMAT", "console")).lower()
-    log_file = log_file if log_file is not None else os.getenv("LOG_FILE", "")
+    env_level = os.getenv("LOG_LEVEL")
+    log_level_requested = log_level is not None or env_level is not None
 
-    numeric_level = getattr(logging, log_level, logging.WARNING)
+    log_level, log_format, numeric_level = _resolve_config(
+        log_level or env_level or "WARNING",
+        log_format or os.getenv("LOG_FORMAT") or "console",
+    )
+    log_file = log_file if log_file is not None else os.getenv("LOG_FILE", "")
 
     root_logger = logging.getLogger()
+    config = (numeric_level, log_format, log_file, log_level_requested)
+    if (
+        _active_config is not None
+        and _active_config[0] == config
+        and root_logger.handlers == _active_config[1]
+        and root_logger.level == numeric_level
+        and (not log_file or _queue_listener is not None)
+    ):
+        return
+
     root_logger.setLevel(numeric_level)
 
-    for handler in root_logger.handlers[:]:
-        root_logger.removeHandler(handler)
+    for handler in root_logger.handlers:
+        try:
+            handler.close()
+        except Exception:
+            pass  # Handler de terceiros com falha ao fechar não impede a reconfiguração
+    root_logger.handlers.clear()
+    _stop_queue_listener()
 
-    if log_format == "json":
-        formatter = StructuredFormatter()
-    else:
-        formatter = ConsoleFormatter()
+    if not log_level_requested and not log_file:
+        # Caso comum sem configuração: só o NullHandler, sem formatters nem banner
+        root_logger.addHandler(logging.NullHandler())
+        _active_config = (config, list(root_logger.handlers))
+        return
 
     if log_level_requested:
         console_handler = logging.StreamHandler(sys.stderr)
-        console_handler.setFormatter(formatter)
+        console_handler.setFormatter(
+            StructuredFormatter() if log_format == "json" else ConsoleFormatter()
+        )
         console_handler.setLevel(numeric_level)
         root_logger.addHandler(console_handler)
 
     if log_file:
-        log_path = Path(log_file)
-        log_path.parent.mkdir(parents=True, exist_ok=True)
+        log_dir = Path(log_file).parent
+        if str(log_dir) not in _dirs_made:
+            log_dir.mkdir(parents=True, exist_ok=True)
+            _dirs_made.add(str(log_dir))
 
-        file_handler = logging.FileHandler(log_file, encoding="utf-8")
+        file_handler = BytesJSONFileHandler(log_file)
+        # Abre já aqui: um caminho inválido falha na inicialização, e não
+        # depois, na thread do listener
+        try:
+            file_handler.stream = file_handler._open()
+        except FileNotFoundError:
+            # Diretório removido desde que foi registrado em _dirs_made
+            log_dir.mkdir(parents=True, exist_ok=True)
+            file_handler.stream = file_handler._open()
         file_handler.setFormatter(StructuredFormatter())
         file_handler.setLevel(numeric_level)
-        root_logger.addHandler(file_handler)
 
-    if not root_logger.handlers:
-        root_logger.addHandler(logging.NullHandler())
+        # Quem loga só enfileira; formatação e escrita ficam na thread do listener
+        log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        _queue_listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+        _queue_listener.start()
 
-    active_handlers = [h for h in root_logger.handlers if not isinstance(h, logging.NullHandler)]
-    if active_handlers:
-        logger = logging.getLogger(__name__)
-        logger.info(
-            "Logging configurado: level=%s, format=%s, file=%s",
-            log_level, log_format, log_file or 'none'
-        )
+        queue_handler = RecordQueueHandler(log_queue)
+        queue_handler.setLevel(numeric_level)
+        root_logger.addHandler(queue_handler)
+
+    _active_config = (config, list(root_logger.handlers))
+
+    logger.info(
+        "Logging configurado: level=%s, format=%s, file=%s",
+        log_level, log_format, log_file or 'none'
+    )
 
 